@@ -0,0 +1,101 @@
+"""
+Compares the batched Banker's safety check and multi-instance detection in
+deadlock_logic.py against the original row-by-row Python loops.
+
+    python benchmarks/bench_bankers.py --sizes 100x8 1000x32 5000x64
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deadlock_logic import BankersAlgorithm, MultiInstanceDetection
+
+
+def legacy_is_safe(available, need, allocation):
+    work = available.copy()
+    finish = [False] * len(allocation)
+    safe_sequence = []
+    while len(safe_sequence) < len(allocation):
+        progress = False
+        for i in range(len(allocation)):
+            if not finish[i] and all(need[i] <= work):
+                work += allocation[i]
+                finish[i] = True
+                safe_sequence.append(i)
+                progress = True
+        if not progress:
+            break
+    if len(safe_sequence) == len(allocation):
+        return True, safe_sequence
+    return False, []
+
+
+def legacy_detect(available, allocation, request):
+    work = np.array(available, dtype=int)
+    num_procs = len(allocation)
+    finish = [bool(np.all(allocation[i] == 0)) for i in range(num_procs)]
+    while True:
+        found = False
+        for i in range(num_procs):
+            if not finish[i] and np.all(request[i] <= work):
+                work += allocation[i]
+                finish[i] = True
+                found = True
+        if not found:
+            break
+    deadlocked_procs = [i for i, f in enumerate(finish) if not f]
+    return len(deadlocked_procs) > 0, deadlocked_procs
+
+
+def make_scenario(num_procs, num_res, seed):
+    rng = np.random.default_rng(seed)
+    allocation = rng.integers(0, 4, size=(num_procs, num_res))
+    max_demand = allocation + rng.integers(0, 6, size=(num_procs, num_res))
+    total = allocation.sum(axis=0) + rng.integers(5, 10, size=num_res)
+    request = rng.integers(0, 3, size=(num_procs, num_res))
+    return total, max_demand, allocation, request
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=['100x8', '1000x32', '5000x64'],
+                        help='process x resource matrix sizes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'size':>10} {'check':>8} {'legacy ms':>11} {'batched ms':>11} {'speedup':>8}")
+    for size in args.sizes:
+        num_procs, num_res = (int(part) for part in size.lower().split('x'))
+        total, max_demand, allocation, request = make_scenario(num_procs, num_res, args.seed)
+        banker = BankersAlgorithm(total, max_demand, allocation)
+        available = banker.available
+
+        legacy_t, legacy = best_of(lambda: legacy_is_safe(available, banker.need, banker.allocation), args.repeat)
+        batched_t, batched = best_of(banker.is_safe, args.repeat)
+        assert legacy == batched, "safe sequences differ"
+        print(f"{size:>10} {'safe':>8} {legacy_t * 1e3:11.2f} {batched_t * 1e3:11.2f} {legacy_t / batched_t:7.1f}x")
+
+        legacy_t, legacy = best_of(lambda: legacy_detect(available, allocation, request), args.repeat)
+        batched_t, batched = best_of(lambda: MultiInstanceDetection.detect(available, allocation, request), args.repeat)
+        assert legacy == batched, "deadlocked sets differ"
+        print(f"{size:>10} {'detect':>8} {legacy_t * 1e3:11.2f} {batched_t * 1e3:11.2f} {legacy_t / batched_t:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
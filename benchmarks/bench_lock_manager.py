@@ -0,0 +1,77 @@
+"""
+Measures the overhead of lock_manager.ManagedLock against a bare
+threading.Lock: uncontended acquire/release and `with` blocks in ns per
+operation, and a contended run where several threads share one lock.
+
+    python benchmarks/bench_lock_manager.py --ops 200000 --threads 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lock_manager import LockManager, ManagedLock
+
+
+def acquire_release(lock, ops):
+    acquire, release = lock.acquire, lock.release
+    start = time.perf_counter()
+    for _ in range(ops):
+        acquire()
+        release()
+    return time.perf_counter() - start
+
+
+def with_block(lock, ops):
+    start = time.perf_counter()
+    for _ in range(ops):
+        with lock:
+            pass
+    return time.perf_counter() - start
+
+
+def contended(lock, ops, threads):
+    def worker():
+        for _ in range(ops):
+            with lock:
+                pass
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def best_of(fn, repeat):
+    return min(fn() for _ in range(repeat))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ops', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, default=4, help='threads in the contended run (0 to skip it)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    manager = LockManager()
+    cases = [("acquire/release", acquire_release), ("with", with_block)]
+    if args.threads:
+        cases.append((f"contended x{args.threads}", lambda lock, ops: contended(lock, ops // args.threads, args.threads)))
+
+    print(f"{'case':>16} {'Lock ns/op':>11} {'Managed ns/op':>14} {'overhead':>9}")
+    for name, run in cases:
+        bare = best_of(lambda: run(threading.Lock(), args.ops), args.repeat)
+        managed_lock = ManagedLock("bench", manager)
+        managed = best_of(lambda: run(managed_lock, args.ops), args.repeat)
+        print(f"{name:>16} {bare / args.ops * 1e9:11.1f} {managed / args.ops * 1e9:14.1f} {managed / bare:8.1f}x")
+    print(f"contended acquires: {managed_lock.contended}  deadlocks: {manager.deadlocks}")
+
+
+if __name__ == '__main__':
+    main()
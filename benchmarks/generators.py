@@ -0,0 +1,112 @@
+"""
+Seeded workload generators for the benchmark suite. Every generator takes
+a numpy Generator so the same seed always yields the same graph or matrix.
+Graph nodes are named "P0", "P1", ... like the processes the frontend sends.
+"""
+import numpy as np
+
+
+def _names(n):
+    return [f"P{i}" for i in range(n)]
+
+
+def acyclic_graph(n, out_degree, rng):
+    # edges only run forward in a random topological order
+    order = rng.permutation(n)
+    names = _names(n)
+    edges = set()
+    for rank in range(n - 1):
+        targets = rng.integers(rank + 1, n, size=min(out_degree, n - rank - 1))
+        for target in targets:
+            edges.add((names[order[rank]], names[order[target]]))
+    return names, sorted(edges)
+
+def cyclic_graph(n, out_degree, cycles, rng):
+    # an acyclic graph plus `cycles` back edges, each closing at least one cycle
+    names, edges = acyclic_graph(n, out_degree, rng)
+    successors = {}
+    for source, target in edges:
+        successors.setdefault(source, []).append(target)
+    added = set(edges)
+    for _ in range(cycles):
+        start = names[int(rng.integers(n))]
+        node = start
+        for _ in range(int(rng.integers(1, 8))):
+            if node not in successors:
+                break
+            node = successors[node][int(rng.integers(len(successors[node])))]
+        if node != start:
+            added.add((node, start))
+    return names, sorted(added)
+
+def chain_graph(n, closed=True):
+    # one long path P0 -> P1 -> ... (closed into a single n-node cycle)
+    names = _names(n)
+    edges = [(names[i], names[i + 1]) for i in range(n - 1)]
+    if closed and n > 1:
+        edges.append((names[-1], names[0]))
+    return names, edges
+
+def dense_graph(n, probability, rng):
+    names = _names(n)
+    mask = rng.random((n, n)) < probability
+    np.fill_diagonal(mask, False)
+    sources, targets = np.nonzero(mask)
+    return names, [(names[s], names[t]) for s, t in zip(sources.tolist(), targets.tolist())]
+
+GRAPH_SHAPES = {
+    "acyclic": lambda n, rng: acyclic_graph(n, 3, rng),
+    "cyclic": lambda n, rng: cyclic_graph(n, 3, max(1, n // 50), rng),
+    "chain": lambda n, rng: chain_graph(n),
+    "dense": lambda n, rng: dense_graph(max(2, int(n ** 0.5) * 4), 0.3, rng),
+}
+
+
+def banker_scenario(num_procs, num_res, rng, safe=True):
+    """
+    Returns (total, max_demand, allocation). Safe scenarios are built
+    backwards from a random completion order with just enough available
+    units for it, so the safety check has to run its full course. Unsafe
+    ones make the last two processes of that order each need one unit more
+    than is left once everyone else has finished.
+    """
+    allocation = rng.integers(0, 4, size=(num_procs, num_res))
+    need = rng.integers(0, 6, size=(num_procs, num_res))
+    order = rng.permutation(num_procs)
+    released = np.cumsum(allocation[order], axis=0) - allocation[order]
+    available = np.maximum(need[order] - released, 0).max(axis=0)
+    if not safe and num_procs >= 2:
+        a, b = order[-2], order[-1]
+        res = int(rng.integers(num_res))
+        allocation[[a, b], res] = np.maximum(allocation[[a, b], res], 1)
+        left = available[res] + allocation[:, res].sum() - allocation[a, res] - allocation[b, res]
+        need[[a, b], res] = left + 1
+    total = allocation.sum(axis=0) + available
+    return total, allocation + need, allocation
+
+def detection_scenario(num_procs, num_res, rng, contended=False):
+    """
+    Returns (available, allocation, request) for multi-instance detection.
+    Requests are the remaining need of a banker_scenario, so every process
+    can finish in clear scenarios and exactly two end up deadlocked, after
+    all the others have run, in contended ones.
+    """
+    total, max_demand, allocation = banker_scenario(num_procs, num_res, rng, safe=not contended)
+    return total - allocation.sum(axis=0), allocation, max_demand - allocation
+
+def detection_chain(num_procs, num_res):
+    """
+    Worst case for pass-based reduction: process i holds one unit of
+    resource i % m and requests every unit of resource (i + 1) % m held by
+    later processes, so only the last process can run at first and the
+    rest become satisfiable one at a time in reverse scan order. A
+    rescanning detector releases a single process per pass; everything
+    finishes in the end.
+    """
+    allocation = np.zeros((num_procs, num_res), dtype=np.int64)
+    request = np.zeros((num_procs, num_res), dtype=np.int64)
+    rows = np.arange(num_procs)
+    allocation[rows, rows % num_res] = 1
+    request[rows, (rows + 1) % num_res] = (num_procs - rows - 1 + num_res - 1) // num_res
+    available = np.zeros(num_res, dtype=np.int64)
+    return available, allocation, request
@@ -0,0 +1,245 @@
+"""
+Benchmark suite for the algorithms in deadlock_logic.py, timed directly
+and through the Flask test client on seeded workloads.
+
+    python benchmarks/suite.py --scale medium --output before.json
+    python benchmarks/suite.py --scale medium --compare before.json
+
+Each case reports latency percentiles over --repeat timed runs and the
+peak traced memory of one extra run under tracemalloc, so the memory
+measurement does not slow down the timed runs.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from deadlock_logic import BankersAlgorithm, DeadlockGraph, IncrementalDeadlockGraph, MultiInstanceDetection
+from generators import GRAPH_SHAPES, banker_scenario, detection_chain, detection_scenario
+
+SCALES = {
+    "small": {"graph": [100], "matrix": [(50, 4)]},
+    "medium": {"graph": [100, 1000], "matrix": [(50, 4), (500, 16)]},
+    "large": {"graph": [1000, 10000], "matrix": [(500, 16), (5000, 64)]},
+}
+
+
+class Case:
+    """
+    A named benchmark. `setup` runs untimed before every sample and its
+    return value is passed to `run`, so cases that mutate state (grants,
+    cache fills) start each sample from the same point.
+    """
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+def build_graph(cls, nodes, edges):
+    graph = cls()
+    for node in nodes:
+        graph.add_node(node)
+    for source, target in edges:
+        graph.add_edge(source, target)
+    return graph
+
+def graph_cases(sizes, seed):
+    for shape, generate in GRAPH_SHAPES.items():
+        for n in sizes:
+            nodes, edges = generate(n, np.random.default_rng(seed))
+            graph = build_graph(DeadlockGraph, nodes, edges)
+            tag = f"{shape}/{len(nodes)}"
+            yield Case(f"graph/detect_deadlock/{tag}", lambda _, g=graph: g.detect_deadlock())
+            yield Case(f"graph/find_deadlocks/{tag}", lambda _, g=graph: g.find_deadlocks())
+            yield Case(f"graph/incremental_build/{tag}",
+                       lambda _, nodes=nodes, edges=edges: build_graph(IncrementalDeadlockGraph, nodes, edges))
+
+def matrix_cases(sizes, seed):
+    for num_procs, num_res in sizes:
+        tag = f"{num_procs}x{num_res}"
+        for safe in (True, False):
+            total, max_demand, allocation = banker_scenario(num_procs, num_res, np.random.default_rng(seed), safe)
+            kind = "safe" if safe else "unsafe"
+            yield Case(f"banker/is_safe_cold/{kind}/{tag}",
+                       lambda _, args=(total, max_demand, allocation): BankersAlgorithm(*args).is_safe())
+
+        total, max_demand, allocation = banker_scenario(num_procs, num_res, np.random.default_rng(seed))
+        warm = BankersAlgorithm(total, max_demand, allocation)
+        warm.is_safe()
+        yield Case(f"banker/is_safe_warm/{tag}", lambda _, banker=warm: banker.is_safe())
+
+        process_idx = num_procs // 2
+        units = np.minimum(warm.need[process_idx], warm.available).tolist()
+
+        def fresh_banker(args=(total, max_demand, allocation)):
+            banker = BankersAlgorithm(*args)
+            banker.is_safe()
+            return banker
+        yield Case(f"banker/request_resources/{tag}",
+                   lambda banker, idx=process_idx, units=units: banker.request_resources(idx, units), fresh_banker)
+        # A one-unit grant within the slack takes the fast path.
+        small = np.minimum(np.minimum(warm.need[process_idx], warm.slack), 1).tolist()
+        yield Case(f"banker/request_small/{tag}",
+                   lambda banker, idx=process_idx, units=small: banker.request_resources(idx, units), fresh_banker)
+
+        for contended in (False, True):
+            available, allocation, request = detection_scenario(num_procs, num_res, np.random.default_rng(seed), contended)
+            kind = "contended" if contended else "clear"
+            yield Case(f"multi/detect/{kind}/{tag}",
+                       lambda _, args=(available, allocation, request): MultiInstanceDetection.detect(*args))
+
+        chain = detection_chain(num_procs, num_res)
+        yield Case(f"multi/detect/chain/{tag}", lambda _, args=chain: MultiInstanceDetection.detect(*args))
+
+def http_cases(graph_sizes, matrix_sizes, seed):
+    from server import create_app, result_cache
+
+    client = create_app({"MONITOR": False, "LOG_LEVEL": "WARNING"}).test_client()
+
+    def post(path, body):
+        response = client.post(path, json=body)
+        assert response.status_code == 200, (path, response.status_code)
+        return response
+
+    n = graph_sizes[-1]
+    for shape, generate in GRAPH_SHAPES.items():
+        nodes, edges = generate(n, np.random.default_rng(seed))
+        body = {"nodes": nodes, "edges": edges}
+        yield Case(f"http/detect/{shape}/{len(nodes)}", lambda _, body=body: post('/api/detect', body), result_cache.clear)
+
+    num_procs, num_res = matrix_sizes[-1]
+    tag = f"{num_procs}x{num_res}"
+    total, max_demand, allocation = banker_scenario(num_procs, num_res, np.random.default_rng(seed))
+    banker_body = {"total": total.tolist(), "max_demand": max_demand.tolist(), "allocation": allocation.tolist()}
+    yield Case(f"http/banker_safe/{tag}", lambda _: post('/api/banker/safe', banker_body), result_cache.clear)
+
+    banker = BankersAlgorithm(total, max_demand, allocation)
+    process_idx = num_procs // 2
+    request_body = dict(banker_body, process_idx=process_idx,
+                        request=np.minimum(banker.need[process_idx], banker.available).tolist())
+    yield Case(f"http/banker_request/{tag}", lambda _: post('/api/banker/request', request_body))
+
+    for contended in (False, True):
+        available, allocation, request = detection_scenario(num_procs, num_res, np.random.default_rng(seed), contended)
+        body = {"available": available.tolist(), "allocation": allocation.tolist(), "request": request.tolist()}
+        kind = "contended" if contended else "clear"
+        yield Case(f"http/detect_multi/{kind}/{tag}", lambda _, body=body: post('/api/detect/multi', body), result_cache.clear)
+
+
+def measure(case, repeat, warmup):
+    for _ in range(warmup):
+        case.run(case.setup())
+    samples = []
+    for _ in range(repeat):
+        state = case.setup()
+        start = time.perf_counter()
+        case.run(state)
+        samples.append(time.perf_counter() - start)
+
+    state = case.setup()
+    tracemalloc.start()
+    try:
+        case.run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    ms = np.array(samples) * 1e3
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "name": case.name,
+        "samples": repeat,
+        "p50_ms": round(float(p50), 4),
+        "p90_ms": round(float(p90), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "min_ms": round(float(ms.min()), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+def compare(results, baseline, threshold):
+    """Prints p50 and peak-memory ratios against a saved run; returns the regressed case names."""
+    previous = {entry["name"]: entry for entry in baseline["results"]}
+    for key in ("scale", "seed"):
+        if baseline["meta"].get(key) != results["meta"].get(key):
+            print(f"warning: baseline {key}={baseline['meta'].get(key)!r} differs from this run", file=sys.stderr)
+
+    regressions = []
+    print(f"\n{'case':<52} {'p50 before':>11} {'p50 after':>10} {'ratio':>7} {'peak ratio':>11}")
+    for entry in results["results"]:
+        old = previous.get(entry["name"])
+        if old is None:
+            continue
+        ratio = entry["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float('inf')
+        peak_ratio = entry["peak_kib"] / old["peak_kib"] if old["peak_kib"] else float('nan')
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(entry["name"])
+            flag = "  slower"
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{entry['name']:<52} {old['p50_ms']:11.3f} {entry['p50_ms']:10.3f} {ratio:6.2f}x {peak_ratio:10.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='medium')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this string')
+    parser.add_argument('--no-http', action='store_true', help='skip the Flask test client cases')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative p50 change reported as a regression')
+    args = parser.parse_args(argv)
+
+    scale = SCALES[args.scale]
+    cases = [*graph_cases(scale["graph"], args.seed), *matrix_cases(scale["matrix"], args.seed)]
+    if not args.no_http:
+        cases.extend(http_cases(scale["graph"], scale["matrix"], args.seed))
+
+    results = {
+        "meta": {
+            "scale": args.scale,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        "results": []
+    }
+    print(f"{'case':<52} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'peak KiB':>10}")
+    for case in cases:
+        if args.filter not in case.name:
+            continue
+        entry = measure(case, args.repeat, args.warmup)
+        results["results"].append(entry)
+        print(f"{entry['name']:<52} {entry['p50_ms']:9.3f} {entry['p90_ms']:9.3f} {entry['p99_ms']:9.3f} {entry['peak_kib']:10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
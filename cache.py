@@ -0,0 +1,117 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def matrix_key(endpoint, *arrays):
+    """
+    Canonical key for matrix inputs: each array is normalized to contiguous
+    int64 so nested lists and arrays with the same values hash the same.
+    """
+    digest = hashlib.blake2b(endpoint.encode(), digest_size=16)
+    for array in arrays:
+        if hasattr(array, 'indptr'):
+            # sparse.CSRMatrix: hash its canonical (sorted, zero-free) parts
+            digest.update(b'csr' + repr(array.shape).encode())
+            for part in (array.indptr, array.indices, array.data):
+                digest.update(np.ascontiguousarray(part, dtype=np.int64).tobytes())
+            continue
+        array = np.ascontiguousarray(np.asarray(array, dtype=np.int64))
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def graph_key(endpoint, nodes, edges):
+    """
+    Canonical key for a graph: the sorted node set and sorted, de-duplicated
+    edge set, so the same graph sent in any order hits the same entry.
+    """
+    nodes = sorted({json.dumps(node) for node in nodes})
+    edges = sorted({json.dumps([edge[0], edge[1]]) for edge in edges})
+    digest = hashlib.blake2b(endpoint.encode(), digest_size=16)
+    digest.update(json.dumps([nodes, edges]).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with per-entry TTL for results of pure endpoints.
+    Entries are evicted least recently used first when `max_entries` or the
+    optional `max_bytes` limit (JSON-encoded size of the results) is exceeded.
+    """
+    def __init__(self, max_entries=1024, ttl=300.0, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires = entry
+            if expires is not None and expires < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = len(json.dumps(value))
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -1,5 +1,9 @@
+from collections import deque
+
 import numpy as np
 
+import metrics
+
 class Resource:
     def __init__(self, name, total_units):
         self.name = name
@@ -42,35 +46,437 @@ class DeadlockGraph:
     
     def add_node(self, node):
         if node not in self.adjacency_list:
-            self.adjacency_list[node] = []
+            # Successors are kept as an insertion-ordered set (dict keys) so
+            # membership checks are O(1) and traversal order stays stable.
+            self.adjacency_list[node] = {}
 
     def add_edge(self, from_node, to_node):
         self.add_node(from_node)
         self.add_node(to_node)
-        if to_node not in self.adjacency_list[from_node]:
-            self.adjacency_list[from_node].append(to_node)
+        self.adjacency_list[from_node][to_node] = None
+
+    def remove_edge(self, from_node, to_node):
+        self.adjacency_list.get(from_node, {}).pop(to_node, None)
+
+    @metrics.timed(metrics.ALGORITHM_SECONDS, 'strongly_connected_components')
+    def strongly_connected_components(self):
+        """
+        Iterative Tarjan's algorithm. Runs in O(V+E) without recursion, so
+        large wait-for graphs cannot hit the interpreter's recursion limit.
+        """
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+
+        for root in self.adjacency_list:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.adjacency_list[root]))]
+            while work:
+                node, neighbors = work[-1]
+                advanced = False
+                for neighbor in neighbors:
+                    if neighbor not in index:
+                        index[neighbor] = lowlink[neighbor] = counter
+                        counter += 1
+                        stack.append(neighbor)
+                        on_stack.add(neighbor)
+                        work.append((neighbor, iter(self.adjacency_list.get(neighbor, ()))))
+                        advanced = True
+                        break
+                    if neighbor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[neighbor])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component[::-1])
+        return components
+
+    def deadlocked_components(self):
+        """
+        Returns every strongly connected component that contains a cycle:
+        components with more than one node, or a single node waiting on itself.
+        """
+        return [
+            component for component in self.strongly_connected_components()
+            if len(component) > 1 or component[0] in self.adjacency_list.get(component[0], ())
+        ]
+
+    def find_cycle(self, component):
+        """
+        Returns one witness cycle (shortest through the component's first node)
+        as a list of nodes, restricted to the given component.
+        """
+        members = set(component)
+        start = component[0]
+        parent = {}
+        queue = deque()
+        for neighbor in self.adjacency_list.get(start, ()):
+            if neighbor == start:
+                return [start]
+            if neighbor in members and neighbor not in parent:
+                parent[neighbor] = start
+                queue.append(neighbor)
+        while queue:
+            node = queue.popleft()
+            for neighbor in self.adjacency_list.get(node, ()):
+                if neighbor == start:
+                    cycle = [node]
+                    while cycle[-1] != start:
+                        cycle.append(parent[cycle[-1]])
+                    return cycle[::-1]
+                if neighbor in members and neighbor not in parent:
+                    parent[neighbor] = node
+                    queue.append(neighbor)
+        return []
+
+    @metrics.timed(metrics.ALGORITHM_SECONDS, 'find_deadlocks')
+    def find_deadlocks(self):
+        """
+        Returns (components, cycles): every deadlocked component and one
+        witness cycle per component.
+        """
+        metrics.GRAPH_NODES.observe(len(self.adjacency_list))
+        components = self.deadlocked_components()
+        return components, [self.find_cycle(component) for component in components]
 
     def detect_deadlock(self):
-        visited = set()
-        rec_stack = set()
-        def dfs(node):
-            if node in rec_stack:
-                return True
-            if node in visited:
-                return False
-            visited.add(node)
-            rec_stack.add(node)
-            for neighbor in self.adjacency_list.get(node, []):
-                if dfs(neighbor):
-                    return True
-            rec_stack.remove(node)
-            return False
-        for node in self.adjacency_list:
-            if dfs(node):
-                return True
-        return False
+        return len(self.deadlocked_components()) > 0
+
+class IncrementalDeadlockGraph(DeadlockGraph):
+    """
+    Wait-for graph maintained across edge updates. The acyclic part of the
+    graph keeps an online topological order (Pearce-Kelly), so each insert only
+    searches the nodes between the edge's endpoints in that order. Edges that
+    would close a cycle are still stored but tracked in `cycle_edges`; the
+    graph is deadlocked exactly while that set is non-empty. Each cycle edge
+    keeps the cycle that witnessed it, so re-adding it is O(1) and removing
+    an edge only re-examines the cycle edges whose witness ran through it.
+    """
+    def __init__(self):
+        super().__init__()
+        self.predecessors = {}
+        self.order = {}
+        self.cycle_edges = set()
+        self._witnesses = {}
+        self._dependents = {}
+        self._next_order = 0
+
+    def add_node(self, node):
+        if node not in self.adjacency_list:
+            super().add_node(node)
+            self.predecessors[node] = {}
+            self.order[node] = self._next_order
+            self._next_order += 1
+
+    def add_edge(self, from_node, to_node):
+        """
+        Adds the edge and returns the cycle it closes as a list of nodes, or an
+        empty list if the edge keeps the graph acyclic. Re-adding a cycle edge
+        returns its stored witness, which callers must not modify.
+        """
+        self.add_node(from_node)
+        self.add_node(to_node)
+        if to_node in self.adjacency_list[from_node]:
+            witness = self._witnesses.get((from_node, to_node))
+            return witness or []
+        self.adjacency_list[from_node][to_node] = None
+        self.predecessors[to_node][from_node] = None
+        cycle = self._insert_ordered(from_node, to_node)
+        if cycle:
+            self.cycle_edges.add((from_node, to_node))
+            self._set_witness((from_node, to_node), cycle)
+        return cycle
+
+    def remove_edge(self, from_node, to_node):
+        """
+        Removes the edge and returns whether the graph is still deadlocked.
+        Dropping an edge never invalidates the topological order, and a cycle
+        edge whose witness avoids the removed edge still closes that cycle,
+        so only the cycle edges depending on it are re-examined.
+        """
+        if to_node not in self.adjacency_list.get(from_node, {}):
+            return self.detect_deadlock()
+        del self.adjacency_list[from_node][to_node]
+        del self.predecessors[to_node][from_node]
+        edge = (from_node, to_node)
+        if edge in self.cycle_edges:
+            self.cycle_edges.discard(edge)
+            self._drop_witness(edge)
+        else:
+            for dependent in list(self._dependents.get(edge, ())):
+                self._drop_witness(dependent)
+                cycle = self._insert_ordered(*dependent)
+                if cycle:
+                    self._set_witness(dependent, cycle)
+                else:
+                    self.cycle_edges.discard(dependent)
+        return self.detect_deadlock()
+
+    def remove_node(self, node):
+        if node not in self.adjacency_list:
+            return self.detect_deadlock()
+        for successor in list(self.adjacency_list[node]):
+            self.remove_edge(node, successor)
+        for predecessor in list(self.predecessors[node]):
+            self.remove_edge(predecessor, node)
+        del self.adjacency_list[node]
+        del self.predecessors[node]
+        del self.order[node]
+        return self.detect_deadlock()
+
+    def detect_deadlock(self):
+        return len(self.cycle_edges) > 0
+
+    def _is_ordered_edge(self, from_node, to_node):
+        return (from_node, to_node) not in self.cycle_edges
+
+    def _insert_ordered(self, from_node, to_node):
+        if from_node == to_node:
+            return [from_node]
+        lower = self.order[to_node]
+        upper = self.order[from_node]
+        if lower > upper:
+            return []
+
+        # Forward search from to_node over nodes ordered before from_node.
+        parent = {to_node: None}
+        stack = [to_node]
+        forward = []
+        while stack:
+            node = stack.pop()
+            forward.append(node)
+            for successor in self.adjacency_list[node]:
+                if not self._is_ordered_edge(node, successor) or (node, successor) == (from_node, to_node):
+                    continue
+                if successor == from_node:
+                    cycle = [from_node, node]
+                    while parent[cycle[-1]] is not None:
+                        cycle.append(parent[cycle[-1]])
+                    return [from_node] + cycle[1:][::-1]
+                if successor not in parent and self.order[successor] < upper:
+                    parent[successor] = node
+                    stack.append(successor)
+
+        # Backward search from from_node over nodes ordered after to_node.
+        seen = {from_node}
+        stack = [from_node]
+        backward = []
+        while stack:
+            node = stack.pop()
+            backward.append(node)
+            for predecessor in self.predecessors[node]:
+                if not self._is_ordered_edge(predecessor, node):
+                    continue
+                if predecessor not in seen and self.order[predecessor] > lower:
+                    seen.add(predecessor)
+                    stack.append(predecessor)
+
+        # Reassign the affected slots: everything reaching from_node now comes
+        # before everything reachable from to_node.
+        backward.sort(key=self.order.__getitem__)
+        forward.sort(key=self.order.__getitem__)
+        affected = backward + forward
+        slots = sorted(self.order[node] for node in affected)
+        for node, slot in zip(affected, slots):
+            self.order[node] = slot
+        return []
+
+    def _witness_edges(self, cycle):
+        # The cycle starts with the cycle edge itself; the rest are ordered edges.
+        return [(cycle[k], cycle[k + 1]) for k in range(1, len(cycle) - 1)] + [(cycle[-1], cycle[0])]
+
+    def _set_witness(self, edge, cycle):
+        self._witnesses[edge] = cycle
+        if len(cycle) > 1:
+            for ordered in self._witness_edges(cycle):
+                self._dependents.setdefault(ordered, set()).add(edge)
+
+    def _drop_witness(self, edge):
+        cycle = self._witnesses.pop(edge, None)
+        if cycle and len(cycle) > 1:
+            for ordered in self._witness_edges(cycle):
+                dependents = self._dependents.get(ordered)
+                if dependents is not None:
+                    dependents.discard(edge)
+                    if not dependents:
+                        del self._dependents[ordered]
+
+
+def _as_int_array(values):
+    """
+    Integer view of the input without copying when it already is an integer
+    array (e.g. a buffer wrapped with np.frombuffer).
+    """
+    array = np.asarray(values)
+    return array if array.dtype.kind in 'iu' else array.astype(int)
+
+
+# Blocked rows settled together within a pass; bounds the cost of a round
+# when each round only releases a few rows (long dependency chains).
+_SCAN_BLOCK = 256
+
+
+def _scan_order(demand, allocation, work, finish):
+    """
+    Batched equivalent of the repeated row-by-row scan used by the safety and
+    detection algorithms: the first unfinished row whose demand fits in `work`
+    finishes and releases its allocation, and passes repeat until none fits.
+    A row finishes in a pass exactly when its demand fits in `work` plus the
+    allocations of the rows that finish before it in that pass. Each pass
+    tests every unfinished row once; rows that fit are final, since work only
+    grows. The blocked rows are then settled block by block in scan order:
+    rounds re-test only the still-blocked rows of the block against what the
+    rows finished before them release, until a round finishes nothing. The
+    order produced matches the row-by-row scan exactly. Updates `work` and
+    `finish` in place and returns the finishing order.
+    """
+    sequence = []
+    rounds = steps = 0
+    pending = np.flatnonzero(~finish)
+    while pending.size:
+        rounds += 1
+        steps += 1
+        ready = np.all(demand[pending] <= work, axis=1)
+        picked = pending[ready]
+        if picked.size == 0:
+            break
+        finish[picked] = True
+        blocked = pending[~ready]
+        if blocked.size:
+            # Work each blocked row sees once the ready rows before it finish.
+            gains = np.cumsum(allocation[picked], axis=0)
+            before = np.searchsorted(picked, blocked)
+            base = work + _shifted(gains)[before]
+            released = np.zeros_like(work)
+            for start in range(0, blocked.size, _SCAN_BLOCK):
+                rows = blocked[start:start + _SCAN_BLOCK]
+                reach = base[start:start + _SCAN_BLOCK] + released
+                while rows.size:
+                    steps += 1
+                    fits = np.all(demand[rows] <= reach, axis=1)
+                    done = rows[fits]
+                    if done.size == 0:
+                        break
+                    finish[done] = True
+                    released += allocation[done].sum(axis=0)
+                    rows = rows[~fits]
+                    reach = reach[~fits] + _shifted(np.cumsum(allocation[done], axis=0))[np.searchsorted(done, rows)]
+            work += released
+        work += gains[-1] if blocked.size else allocation[picked].sum(axis=0)
+        passed = pending[finish[pending]]
+        sequence.extend(passed.tolist())
+        pending = pending[~finish[pending]]
+    metrics.SCAN_ROUNDS.observe(rounds)
+    metrics.SCAN_STEPS.observe(steps)
+    return sequence
+
+
+def _shifted(gains):
+    """Running sums preceded by a zero row: entry k sums the first k rows."""
+    return np.concatenate([np.zeros((1, gains.shape[1]), dtype=gains.dtype), gains])
+
+
+def _reduce(request, allocation, work, finish):
+    """
+    Marks every process that can finish given `work`. Finishing order does
+    not change which processes can finish, so each round releases every
+    satisfiable row with one broadcast; typical states clear in a few
+    rounds. Long dependency chains would take about one round per row, so
+    once the rounds have rescanned eight times as many rows as there are
+    processes the work-queue reduction takes over the rest. Updates `work`
+    and `finish` in place.
+    """
+    pending = np.flatnonzero(~finish)
+    budget = 8 * len(finish)
+    rounds = 0
+    while pending.size:
+        rounds += 1
+        ready = np.all(request[pending] <= work, axis=1)
+        released = np.count_nonzero(ready)
+        if released == 0:
+            break
+        finish[pending[ready]] = True
+        work += allocation[pending[ready]].sum(axis=0)
+        budget -= pending.size
+        pending = pending[~ready]
+        if budget < 0 and pending.size:
+            remaining = np.zeros(pending.size, dtype=bool)
+            rounds += _reduce_queue(request[pending], allocation[pending], work, remaining)
+            finish[pending] = remaining
+            break
+    metrics.REDUCTION_ROUNDS.observe(rounds)
+
+def _reduce_queue(request, allocation, work, finish):
+    """
+    Work-queue reduction in the style of Holt's algorithm: each resource
+    keeps its rows sorted by request and a pointer past the requests `work`
+    already covers, and each row counts the resources still blocking it.
+    Releasing allocations only advances the pointers of resources whose
+    work grew, and the rows passed over are the only ones whose counters
+    change. Sorting dominates at O(n*m*log n); every row is passed over at
+    most once per resource. Returns the number of rounds taken.
+    """
+    num_res = request.shape[1]
+    if num_res == 0:
+        finish[:] = True
+        return 0
+    rows_by_demand = np.argsort(request, axis=0, kind='stable')
+    ranked = np.take_along_axis(request, rows_by_demand, axis=0).astype(np.int64)
+    # Columns are laid end to end with disjoint value ranges, so one
+    # searchsorted call finds every resource's pointer at once.
+    low = min(int(ranked[0].min()), 0)
+    span = int(ranked[-1].max()) - low + 1
+    offsets = np.arange(num_res, dtype=np.int64) * span
+    keys = (ranked - low + offsets).T.ravel()
+    owners = rows_by_demand.T.ravel()
+
+    def covered(work):
+        return np.searchsorted(keys, np.clip(work - low, -1, span - 1) + offsets, side='right')
+
+    pointer = covered(work)
+    blocked = np.count_nonzero(request > work, axis=1)
+    ready = np.flatnonzero((blocked == 0) & ~finish)
+    rounds = 0
+    while ready.size:
+        rounds += 1
+        finish[ready] = True
+        work += allocation[ready].sum(axis=0)
+        advanced = covered(work)
+        moved = advanced - pointer
+        total = int(moved.sum())
+        if total == 0:
+            break
+        # Flat indices pointer[j]..advanced[j] for every resource j.
+        starts = np.repeat(pointer - (np.cumsum(moved) - moved), moved)
+        woken = owners[starts + np.arange(total)]
+        np.subtract.at(blocked, woken, 1)
+        pointer = advanced
+        woken = np.unique(woken)
+        ready = woken[(blocked[woken] == 0) & ~finish[woken]]
+    return rounds
+
 
 class BankersAlgorithm:
+    @metrics.timed(metrics.ALGORITHM_SECONDS, 'banker_init')
     def __init__(self, total_resources, max_demand, allocation):
         # Inputs are numpy arrays or lists
         self.total_resources = np.array(total_resources)
@@ -78,34 +484,92 @@ class BankersAlgorithm:
         self.allocation = np.array(allocation)
         self.need = self.max_demand - self.allocation
         self.available = self.total_resources - np.sum(self.allocation, axis=0)
-        
+        # Last safe sequence found; used as a warm start for the next check.
+        self.safe_sequence = None
+        # Per-resource bound within which a single request keeps that
+        # sequence valid (see _slack). None until a safe state is seen.
+        self.slack = None
+        self.fast_path_hits = 0
+        self.slow_path_hits = 0
+        metrics.MATRIX_PROCESSES.observe(self.allocation.shape[0], 'banker')
+        metrics.MATRIX_RESOURCES.observe(self.allocation.shape[-1], 'banker')
+
+    @metrics.timed(metrics.ALGORITHM_SECONDS, 'banker_is_safe')
     def is_safe(self):
         work = self.available.copy()
-        finish = [False] * len(self.allocation)
-        safe_sequence = []
-
-        while len(safe_sequence) < len(self.allocation):
-            progress = False
-            for i in range(len(self.allocation)):
-                if not finish[i] and all(self.need[i] <= work):
-                    work += self.allocation[i]
-                    finish[i] = True
-                    safe_sequence.append(i)
-                    progress = True
-            if not progress:
-                break
-        
+        finish = np.zeros(len(self.allocation), dtype=bool)
+        prefix, slack = self._valid_prefix(work, finish)
+        rest = _scan_order(self.need, self.allocation, work, finish)
+        safe_sequence = prefix + rest
+
         if len(safe_sequence) == len(self.allocation):
-            return True, [int(i) for i in safe_sequence]
+            self.safe_sequence = safe_sequence
+            # A sequence replayed whole already gave its slack on the way.
+            self.slack = self._slack(safe_sequence) if rest else slack
+            return True, safe_sequence
         else:
             return False, []
 
+    def _margins(self, sequence, work):
+        """
+        Running sums of the allocations released along `sequence` and, per
+        step, what is free when that process runs minus its need.
+        """
+        gains = np.cumsum(self.allocation[sequence], axis=0)
+        # Built in place: these are P x R temporaries on the hot path.
+        margin = work - self.need[sequence]
+        margin[1:] += gains[:-1]
+        return gains, margin
+
+    def _slack(self, safe_sequence):
+        """
+        min(available, min over k of work_k - need[seq_k]), where work_k is
+        what is free when the k-th process of the sequence runs. Granting
+        r <= slack (and r <= need) to any process lowers work_k by r only up
+        to that process's own position, and its own need drops by r too, so
+        the sequence stays valid. Successive fast grants subtract from the
+        slack; releases only raise the true bound.
+        """
+        if not safe_sequence:
+            return self.available.copy()
+        _, margin = self._margins(np.asarray(safe_sequence), self.available)
+        return np.minimum(self.available, margin.min(axis=0))
+
+    def _valid_prefix(self, work, finish):
+        """
+        Replays the longest prefix of the last safe sequence that is still
+        valid, updating `work` and `finish` as if those processes had run.
+        A grant usually leaves most of the previous sequence intact, so the
+        full scan only has to place the remaining processes. Returns the
+        prefix and, when the whole sequence is still valid, its slack.
+        """
+        if not self.safe_sequence or len(self.safe_sequence) != len(self.allocation):
+            return [], None
+        sequence = np.asarray(self.safe_sequence)
+        gains, margin = self._margins(sequence, work)
+        broken = np.flatnonzero(np.any(margin < 0, axis=1))
+        valid = int(broken[0]) if broken.size else len(sequence)
+        if valid:
+            work += gains[valid - 1]
+            finish[sequence[:valid]] = True
+        slack = None if broken.size else np.minimum(self.available, margin.min(axis=0))
+        return sequence[:valid].tolist(), slack
+
+    @metrics.timed(metrics.ALGORITHM_SECONDS, 'banker_request_resources')
     def request_resources(self, process_idx, request):
         request = np.array(request)
         if all(request <= self.need[process_idx]) and all(request <= self.available):
             self.available -= request
             self.allocation[process_idx] += request
             self.need[process_idx] -= request
+            if self.slack is not None and np.all(request >= 0) and np.all(request <= self.slack):
+                # Provably safe without a rescan; the last sequence still holds.
+                self.slack -= request
+                self.fast_path_hits += 1
+                metrics.BANKER_REQUESTS.inc(1, 'fast')
+                return True, self.safe_sequence
+            self.slow_path_hits += 1
+            metrics.BANKER_REQUESTS.inc(1, 'slow')
             is_safe, safe_sequence = self.is_safe()
             if is_safe:
                 return True, safe_sequence
@@ -115,32 +579,62 @@ class BankersAlgorithm:
                 self.need[process_idx] += request
         return False, []
 
+    def request_batch(self, requests, mode='greedy'):
+        """
+        Admits a list of (process_idx, request) or (process_idx, request, priority)
+        entries in one pass. Entries are considered by descending priority,
+        keeping input order for ties. In 'greedy' mode every request that keeps
+        the state safe given the ones granted before it is granted; in 'prefix'
+        mode admission stops at the first denial. Returns a verdict per entry in
+        input order (True, False, or None if never considered) and the safe
+        sequence of the final state.
+        """
+        if mode not in ('greedy', 'prefix'):
+            raise ValueError(f"Unknown batch mode: {mode}")
+        entries = [tuple(entry) for entry in requests]
+        order = sorted(range(len(entries)), key=lambda k: -(entries[k][2] if len(entries[k]) > 2 else 0))
+        verdicts = [None] * len(entries)
+        for k in order:
+            process_idx, request = entries[k][0], entries[k][1]
+            granted, _ = self.request_resources(process_idx, request)
+            verdicts[k] = granted
+            if not granted and mode == 'prefix':
+                break
+        is_safe, safe_sequence = self.is_safe()
+        return verdicts, safe_sequence
+
+    def release_resources(self, process_idx, release):
+        """
+        Returns units held by a process. Releasing never makes a safe state
+        unsafe, and the last safe sequence stays valid.
+        """
+        release = np.array(release)
+        if np.any(release < 0) or np.any(release > self.allocation[process_idx]):
+            return False
+        self.allocation[process_idx] -= release
+        self.need[process_idx] += release
+        self.available += release
+        return True
+
 class MultiInstanceDetection:
     @staticmethod
+    @metrics.timed(metrics.ALGORITHM_SECONDS, 'multi_instance_detect')
     def detect(available, allocation, request):
         """
         Matrix-based detection algorithm for multi-instance resources.
         """
         work = np.array(available, dtype=int)
-        allocation = np.array(allocation, dtype=int)
-        request = np.array(request, dtype=int)
-        num_procs = len(allocation)
-        
-        finish = [False] * num_procs
-        for i in range(num_procs):
-            if np.all(allocation[i] == 0):
-                finish[i] = True
-        
-        while True:
-            found = False
-            for i in range(num_procs):
-                if not finish[i] and np.all(request[i] <= work):
-                    work += allocation[i]
-                    finish[i] = True
-                    found = True
-            if not found:
-                break
-        
-        deadlocked_procs = [i for i, f in enumerate(finish) if not f]
+        allocation = _as_int_array(allocation)
+        request = _as_int_array(request)
+        if len(allocation) == 0:
+            return False, []
+        metrics.MATRIX_PROCESSES.observe(allocation.shape[0], 'multi_instance')
+        metrics.MATRIX_RESOURCES.observe(allocation.shape[-1], 'multi_instance')
+
+        # Processes holding nothing cannot be part of a deadlock.
+        finish = np.all(allocation == 0, axis=1)
+        _reduce(request, allocation, work, finish)
+
+        deadlocked_procs = np.flatnonzero(~finish).tolist()
         return len(deadlocked_procs) > 0, deadlocked_procs
 
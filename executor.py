@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorBusy(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-heavy requests with a cap on queued work. Large
+    matrix requests run here so at most `max_workers` of them compute at
+    once, while small requests keep running inline on the server's own
+    threads. Submissions beyond `max_pending` are rejected with
+    ExecutorBusy instead of piling up. Workers are threads, so this bounds
+    concurrency but does not isolate pure-Python work (graph detection, the
+    sparse reduction) from the GIL; run more server processes for that.
+    """
+    def __init__(self, max_workers=2, max_pending=16):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="heavy")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def run(self, fn, timeout=None):
+        if not self._slots.acquire(blocking=False):
+            raise ExecutorBusy("Too many large requests in flight")
+        try:
+            future = self._pool.submit(fn)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=timeout)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
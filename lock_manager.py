@@ -0,0 +1,261 @@
+"""
+Runtime lock manager that detects deadlocks between live threads or
+asyncio tasks.
+
+ManagedLock is a mutex modelled as a single-unit Resource. An uncontended
+acquire or release only touches the lock itself. A waiter that finds the
+lock taken registers a wait edge (waiter -> lock -> owner) with its
+LockManager and walks the chain of owners to see whether the edge closes
+a cycle. Each waiter waits for one lock at a time, so the walk is a single
+path. The cycle check runs only when an acquire actually blocks and is
+repeated while the waiter stays blocked, so an owner that changes while
+the chain is walked is caught on the next check. When a cycle is found
+the manager picks a victim (by default the waiter that closed the cycle)
+and raises DeadlockError in that waiter, which can release its locks and
+retry.
+"""
+import asyncio
+import threading
+import time
+
+from deadlock_logic import DeadlockGraph, Resource
+
+
+class DeadlockError(RuntimeError):
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__("Deadlock: " + " -> ".join(f"{waiter} waits for {lock}" for waiter, lock in cycle))
+
+
+def requester_victim(cycle):
+    """Default policy: the waiter whose acquire closed the cycle gives up."""
+    return cycle[0][0]
+
+
+class LockManager:
+    """
+    Shared wait-for state of a family of locks. `victim` maps the cycle,
+    a list of (waiter, lock name) pairs starting with the waiter that just
+    blocked, to the waiter that should raise DeadlockError.
+    """
+    def __init__(self, victim=requester_victim, check_interval=0.05):
+        self.victim = victim
+        self.check_interval = check_interval
+        self.deadlocks = 0
+        self._waiting = {}
+        self._victims = {}
+        self._lock = threading.Lock()
+
+    def _cycle_from(self, waiter, lock):
+        """Wait chain from `waiter` back to itself, or None."""
+        cycle = [(waiter, lock)]
+        owner = lock.owner
+        while owner is not None and owner != waiter:
+            lock = self._waiting.get(owner)
+            if lock is None:
+                return None
+            cycle.append((owner, lock))
+            if len(cycle) > len(self._waiting) + 1:
+                return None
+            owner = lock.owner
+        return cycle if owner == waiter else None
+
+    def _check(self, waiter, lock):
+        """
+        Registers `waiter` as blocked on `lock` and looks for a cycle through
+        it. Returns the cycle if `waiter` has to give up, otherwise None;
+        another chosen victim is flagged and raises on its next check.
+        """
+        with self._lock:
+            cycle = self._victims.pop(waiter, None)
+            if cycle is not None:
+                self._waiting.pop(waiter, None)
+                return cycle
+            self._waiting[waiter] = lock
+            cycle = self._cycle_from(waiter, lock)
+            if cycle is None:
+                return None
+            self.deadlocks += 1
+            named = [(member, held.name) for member, held in cycle]
+            victim = self.victim(named)
+            if victim == waiter:
+                del self._waiting[waiter]
+                return named
+            self._victims[victim] = named
+            return None
+
+    def _done_waiting(self, waiter):
+        with self._lock:
+            self._waiting.pop(waiter, None)
+            self._victims.pop(waiter, None)
+
+    def wait_for_graph(self):
+        """Current waits as a DeadlockGraph: waiter -> lock -> owner."""
+        graph = DeadlockGraph()
+        with self._lock:
+            waiting = list(self._waiting.items())
+        for waiter, lock in waiting:
+            graph.add_edge(f"T{waiter}", lock.name)
+            owner = lock.owner
+            if owner is not None:
+                graph.add_edge(lock.name, f"T{owner}")
+        return graph
+
+    def snapshot(self):
+        """Current waits as a DeadlockMonitor snapshot: {"graph": adjacency}."""
+        return {"graph": {node: list(successors) for node, successors in self.wait_for_graph().adjacency_list.items()}}
+
+
+class ManagedLock(Resource):
+    """
+    Drop-in replacement for threading.Lock that takes part in deadlock
+    detection. Not reentrant: acquiring a lock the thread already holds
+    raises DeadlockError instead of hanging.
+    """
+    def __init__(self, name, manager):
+        super().__init__(name, 1)
+        self.manager = manager
+        self.owner = None
+        self.acquisitions = 0
+        self.contended = 0
+        self.deadlocks = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            # Counters written while holding the lock need no other guard.
+            self.owner = threading.get_ident()
+            self.allocated_units = 1
+            self.acquisitions += 1
+            return True
+        if not blocking:
+            return False
+        return self._acquire_slow(timeout)
+
+    def _acquire_slow(self, timeout):
+        me = threading.get_ident()
+        manager = self.manager
+        started = time.perf_counter()
+        deadline = None if timeout is None or timeout < 0 else started + timeout
+        try:
+            while True:
+                cycle = manager._check(me, self)
+                if cycle is not None:
+                    self.deadlocks += 1
+                    raise DeadlockError(cycle)
+                wait = manager.check_interval
+                if deadline is not None:
+                    wait = min(wait, deadline - time.perf_counter())
+                    if wait <= 0:
+                        return False
+                if self._lock.acquire(timeout=wait):
+                    break
+        finally:
+            manager._done_waiting(me)
+            waited = time.perf_counter() - started
+        self.owner = me
+        self.allocated_units = 1
+        self.acquisitions += 1
+        self.contended += 1
+        self.wait_seconds += waited
+        return True
+
+    def release(self):
+        if self.owner != threading.get_ident():
+            raise RuntimeError(f"Lock {self.name} released by a thread that does not hold it")
+        self.owner = None
+        self.allocated_units = 0
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "deadlocks": self.deadlocks,
+            "wait_seconds": self.wait_seconds
+        }
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AsyncManagedLock(Resource):
+    """
+    asyncio counterpart of ManagedLock; waiters are tasks. Must be used
+    from a single event loop, like asyncio.Lock.
+    """
+    def __init__(self, name, manager):
+        super().__init__(name, 1)
+        self.manager = manager
+        self.owner = None
+        self.acquisitions = 0
+        self.contended = 0
+        self.deadlocks = 0
+        self.wait_seconds = 0.0
+        self._lock = asyncio.Lock()
+        # Tasks in _acquire_slow. After a release the lock reads unlocked
+        # until the woken waiter runs, and a new acquire queues behind it.
+        self._waiting = 0
+
+    async def acquire(self):
+        if not self._lock.locked() and not self._waiting:
+            # Unlocked with nobody queued: asyncio.Lock is taken without suspending.
+            await self._lock.acquire()
+            self.owner = id(asyncio.current_task())
+            self.allocated_units = 1
+            self.acquisitions += 1
+            return True
+        return await self._acquire_slow()
+
+    async def _acquire_slow(self):
+        me = id(asyncio.current_task())
+        manager = self.manager
+        started = time.perf_counter()
+        self._waiting += 1
+        pending = asyncio.ensure_future(self._lock.acquire())
+        try:
+            while not pending.done():
+                cycle = manager._check(me, self)
+                if cycle is not None:
+                    self.deadlocks += 1
+                    raise DeadlockError(cycle)
+                await asyncio.wait({pending}, timeout=manager.check_interval)
+        except BaseException:
+            if pending.done() and not pending.cancelled():
+                self._lock.release()
+            pending.cancel()
+            raise
+        finally:
+            self._waiting -= 1
+            manager._done_waiting(me)
+        self.owner = me
+        self.allocated_units = 1
+        self.acquisitions += 1
+        self.contended += 1
+        self.wait_seconds += time.perf_counter() - started
+        return True
+
+    def release(self):
+        if self.owner != id(asyncio.current_task()):
+            raise RuntimeError(f"Lock {self.name} released by a task that does not hold it")
+        self.owner = None
+        self.allocated_units = 0
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    stats = ManagedLock.stats
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.release()
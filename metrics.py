@@ -0,0 +1,174 @@
+"""
+Opt-in instrumentation rendered in the Prometheus text exposition format.
+
+Recording is off by default. Every recording path checks the module-level
+`enabled` flag first, so instrumented hot paths pay one global lookup and
+a branch until enable() is called (the server does this when
+NEXUS_METRICS is set).
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+enabled = False
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384, 65536)
+ROUND_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610, 987)
+
+
+def enable(on=True):
+    global enabled
+    enabled = bool(on)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        if not enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items()) or ([((), 0)] if not self.labels else [])
+        for label_values, value in values:
+            yield f"{self.name}{_label_text(self.labels, label_values)} {_number(value)}"
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram. Buckets are stored per label set as plain
+    counts and only summed into Prometheus' cumulative form when rendered.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        if not enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                running += bucket_count
+                labels = _label_text(self.labels, label_values, [('le', _number(bound))])
+                yield f"{self.name}_bucket{labels} {running}"
+            labels = _label_text(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+ALGORITHM_SECONDS = REGISTRY.register(Histogram(
+    'nexus_algorithm_duration_seconds', 'Time spent in deadlock_logic algorithms.', ['algorithm']))
+MATRIX_PROCESSES = REGISTRY.register(Histogram(
+    'nexus_matrix_processes', 'Process rows of matrices handed to an algorithm.', ['algorithm'], SIZE_BUCKETS))
+MATRIX_RESOURCES = REGISTRY.register(Histogram(
+    'nexus_matrix_resources', 'Resource columns of matrices handed to an algorithm.', ['algorithm'], SIZE_BUCKETS))
+SCAN_ROUNDS = REGISTRY.register(Histogram(
+    'nexus_scan_rounds', 'Passes over the unfinished rows per safety/detection scan.', [], ROUND_BUCKETS))
+SCAN_STEPS = REGISTRY.register(Histogram(
+    'nexus_scan_steps', 'Batched broadcast steps per safety/detection scan.', [], ROUND_BUCKETS))
+REDUCTION_ROUNDS = REGISTRY.register(Histogram(
+    'nexus_reduction_rounds', 'Batches of processes released per multi-instance detection.', [], ROUND_BUCKETS))
+GRAPH_NODES = REGISTRY.register(Histogram(
+    'nexus_graph_nodes', 'Nodes in wait-for graphs searched for cycles.', [], SIZE_BUCKETS))
+BANKER_REQUESTS = REGISTRY.register(Counter(
+    'nexus_banker_requests_total', 'Banker requests granted from the slack (fast) or after a full safety check (slow).', ['path']))
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    'nexus_http_request_duration_seconds', 'Request handling time by route.', ['endpoint', 'method', 'status']))
+HTTP_CODEC_SECONDS = REGISTRY.register(Histogram(
+    'nexus_http_codec_duration_seconds', 'Request decoding and response encoding time.', ['direction', 'format']))
+HTTP_REJECTED = REGISTRY.register(Counter(
+    'nexus_http_rejected_total', 'Heavy requests turned away because the executor was saturated.'))
+
+
+def timed(histogram, *label_values):
+    """
+    Decorator recording the wrapped call's duration in `histogram`. When
+    metrics are disabled it forwards the call without reading the clock.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, *label_values)
+        return wrapper
+    return decorate
@@ -0,0 +1,186 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+
+from deadlock_logic import BankersAlgorithm, DeadlockGraph, MultiInstanceDetection
+
+logger = logging.getLogger('nexus.monitor')
+
+class EventBus:
+    """
+    Minimal publish/subscribe hub. Subscribers are callbacks; listen() wraps
+    a bounded queue for streaming endpoints, dropping events for consumers
+    that fall behind instead of blocking the publisher.
+    """
+    def __init__(self):
+        self._subscribers = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self._lock:
+            token = next(self._ids)
+            self._subscribers[token] = callback
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def listen(self, maxsize=256):
+        events = queue.Queue(maxsize=maxsize)
+
+        def deliver(event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+        return self.subscribe(deliver), events
+
+    def publish(self, event):
+        with self._lock:
+            callbacks = list(self._subscribers.values())
+        for callback in callbacks:
+            callback(event)
+
+
+class DeadlockMonitor:
+    """
+    Background detector. Registered sources return {name: snapshot}, where a
+    snapshot is either {"available", "allocation", "request"} matrices,
+    {"graph": adjacency}, or {"banker": {"total", "max_demand", "allocation"}}.
+    A Banker state only declares future needs, so nothing in it is blocked:
+    it gets a safety verdict ("safe") instead of a deadlock one and adds no
+    contention. Sources copy their state under their own locks, and
+    detection then runs on this thread, off the request path. A "detector"
+    event is published whenever a verdict changes. A source or snapshot that
+    raises is logged and reported in status() under "errors"; the other
+    sources keep being checked.
+
+    The interval adapts to contention (processes with unmet requests): it
+    halves while contention rises and doubles back towards `max_interval`
+    while the system is idle.
+    """
+    def __init__(self, bus, interval=5.0, min_interval=0.5, max_interval=60.0):
+        self.bus = bus
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.results = {}
+        self.errors = {}
+        self.checks = 0
+        self._sources = {}
+        self._contention = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name, source):
+        with self._lock:
+            self._sources[name] = source
+
+    def unregister(self, name):
+        with self._lock:
+            self._sources.pop(name, None)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="deadlock-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def poke(self):
+        """Runs the next check immediately instead of waiting for the interval."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check_once()
+            except Exception:
+                # A failing subscriber must not stop background detection.
+                logger.exception("monitor check failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def check_once(self):
+        with self._lock:
+            sources = list(self._sources.items())
+        snapshots = {}
+        errors = {}
+        for source_name, source in sources:
+            try:
+                snapshots.update(source())
+            except Exception as e:
+                logger.exception("monitor source %s failed", source_name)
+                errors[source_name] = str(e)
+
+        contention = 0
+        results = {}
+        for name, snapshot in snapshots.items():
+            try:
+                result, pending = self._analyze(snapshot)
+            except Exception as e:
+                logger.exception("monitor snapshot %s failed", name)
+                errors[name] = str(e)
+                continue
+            results[name] = result
+            contention += pending
+            previous = self.results.get(name)
+            if previous is None or any(previous.get(key) != result.get(key) for key in ("deadlock", "safe", "processes")):
+                self.bus.publish(dict(result, type="detector", source=name))
+        for name in self.results.keys() - results.keys():
+            self.bus.publish({"type": "detector", "source": name, "removed": True})
+
+        self._adapt(contention)
+        self.results = results
+        self.errors = errors
+        self.checks += 1
+        return results
+
+    def _analyze(self, snapshot):
+        if "graph" in snapshot:
+            graph = DeadlockGraph()
+            for node, successors in snapshot["graph"].items():
+                graph.add_node(node)
+                for successor in successors:
+                    graph.add_edge(node, successor)
+            components, cycles = graph.find_deadlocks()
+            processes = sorted({node for component in components for node in component}, key=str)
+            return {"deadlock": bool(components), "processes": processes, "cycles": cycles, "time": time.time()}, len(processes)
+        if "banker" in snapshot:
+            state = snapshot["banker"]
+            safe, _ = BankersAlgorithm(state["total"], state["max_demand"], state["allocation"]).is_safe()
+            return {"deadlock": False, "safe": safe, "processes": [], "time": time.time()}, 0
+        deadlock, processes = MultiInstanceDetection.detect(snapshot["available"], snapshot["allocation"], snapshot["request"])
+        pending = int((snapshot["request"] > 0).any(axis=1).sum()) if len(snapshot["request"]) else 0
+        return {"deadlock": deadlock, "processes": processes, "time": time.time()}, pending
+
+    def _adapt(self, contention):
+        if contention > self._contention:
+            self.interval = max(self.min_interval, self.interval / 2)
+        elif contention == 0:
+            self.interval = min(self.max_interval, self.interval * 2)
+        self._contention = contention
+
+    def status(self):
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval": self.interval,
+            "checks": self.checks,
+            "sources": sorted(self._sources),
+            "results": self.results,
+            "errors": self.errors
+        }
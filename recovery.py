@@ -1,5 +1,7 @@
 import numpy as np
 
+from deadlock_logic import MultiInstanceDetection
+
 def select_victim(processes, allocation, max_demand, resources):
     """
     Selects a process to terminate to break a deadlock.
@@ -10,14 +12,12 @@ def select_victim(processes, allocation, max_demand, resources):
     
     # Simple cost function: cost = (total_allocated) / (remaining_need + 1)
     # Higher cost = better victim candidate (holding much, needing little more)
-    costs = []
-    for i in range(len(processes)):
-        allocated_total = np.sum(allocation[i])
-        need_total = np.sum(np.array(max_demand[i]) - np.array(allocation[i]))
-        cost = allocated_total / (need_total + 1)
-        costs.append(cost)
+    allocation = np.asarray(allocation)
+    allocated_total = allocation.sum(axis=1)
+    need_total = (np.asarray(max_demand) - allocation).sum(axis=1)
+    costs = allocated_total / (need_total + 1)
     
-    victim_idx = np.argmax(costs)
+    victim_idx = np.argmax(costs[:len(processes)])
     return {
         "index": int(victim_idx),
         "name": processes[victim_idx],
@@ -31,3 +31,154 @@ def simulate_recovery(allocation, victim_idx):
     new_allocation = np.array(allocation).copy()
     new_allocation[victim_idx] = 0
     return new_allocation.tolist()
+
+# Termination cost functions: each maps (allocation, request) matrices to one
+# cost per process in a single vectorized pass. Lower cost = cheaper victim.
+def heuristic_cost(allocation, request):
+    """Inverse of select_victim's preference: cheap to kill if it holds much and needs little."""
+    return (request.sum(axis=1) + 1) / (allocation.sum(axis=1) + 1)
+
+def uniform_cost(allocation, request):
+    """Every termination costs the same, so plans minimize the number of victims."""
+    return np.ones(len(allocation))
+
+def held_cost(allocation, request):
+    """Work lost is proportional to the units a process already holds."""
+    return allocation.sum(axis=1).astype(float)
+
+COST_FUNCTIONS = {
+    "heuristic": heuristic_cost,
+    "uniform": uniform_cost,
+    "held": held_cost
+}
+
+def _deadlocked_after(available, allocation, request, victims):
+    victims = list(victims)
+    allocation = allocation.copy()
+    request = request.copy()
+    freed = allocation[victims].sum(axis=0)
+    allocation[victims] = 0
+    request[victims] = 0
+    return MultiInstanceDetection.detect(available + freed, allocation, request)[1]
+
+def plan_recovery(available, allocation, request, cost="heuristic", max_nodes=1000):
+    """
+    Finds a minimal-cost set of processes to terminate so that
+    MultiInstanceDetection.detect reports no deadlock. A greedy pass (kill the
+    cheapest still-deadlocked process, re-run detection) gives an initial
+    plan, then a branch-and-bound search over the deadlocked processes,
+    limited to `max_nodes` nodes, looks for a cheaper set. `cost` is a name
+    from COST_FUNCTIONS or a callable (allocation, request) -> costs.
+    """
+    available = np.array(available, dtype=int)
+    allocation = np.array(allocation, dtype=int)
+    request = np.array(request, dtype=int)
+    cost_fn = COST_FUNCTIONS[cost] if isinstance(cost, str) else cost
+    costs = np.asarray(cost_fn(allocation, request), dtype=float)
+
+    deadlocked = MultiInstanceDetection.detect(available, allocation, request)[1]
+    if not deadlocked:
+        return {"victims": [], "cost": 0.0, "optimal": True, "steps": [], "new_allocation": allocation.tolist()}
+
+    # Greedy upper bound.
+    greedy = []
+    remaining = deadlocked
+    while remaining:
+        victim = remaining[int(np.argmin(costs[remaining]))]
+        greedy.append(victim)
+        remaining = _deadlocked_after(available, allocation, request, greedy)
+    best = tuple(greedy)
+    best_cost = float(costs[greedy].sum())
+
+    # Branch and bound over the initially deadlocked processes, cheapest
+    # first. Each node decides whether candidates[index] is terminated.
+    candidates = sorted(deadlocked, key=lambda i: costs[i])
+    stack = [(0, (), 0.0, False)]
+    nodes = 0
+    while stack and nodes < max_nodes:
+        index, killed, killed_cost, known_unresolved = stack.pop()
+        nodes += 1
+        if killed_cost >= best_cost:
+            continue
+        if killed and not known_unresolved and not _deadlocked_after(available, allocation, request, killed):
+            best, best_cost = killed, killed_cost
+            continue
+        if index == len(candidates) or killed_cost + costs[candidates[index]] >= best_cost:
+            continue
+        victim = candidates[index]
+        stack.append((index + 1, killed, killed_cost, True))
+        stack.append((index + 1, killed + (victim,), killed_cost + costs[victim], False))
+
+    victims = sorted(best, key=lambda i: costs[i])
+    steps = []
+    for k in range(len(victims)):
+        steps.append({
+            "victim": victims[k],
+            "cost": float(costs[victims[k]]),
+            "deadlocked_processes": _deadlocked_after(available, allocation, request, victims[:k + 1])
+        })
+    new_allocation = allocation.copy()
+    new_allocation[victims] = 0
+    return {
+        "victims": victims,
+        "cost": best_cost,
+        "optimal": not stack,
+        "steps": steps,
+        "new_allocation": new_allocation.tolist()
+    }
+
+def plan_preemption(available, allocation, request):
+    """
+    Partial-rollback recovery: instead of terminating processes, preempt just
+    enough units from deadlocked processes for every process to finish.
+    Whenever the reduction stalls, the blocked process with the smallest
+    total shortfall is unblocked by taking its shortfall from the other
+    unfinished processes, largest holders first per resource. Preempted
+    units are added back to the donors' requests. Returns None if no
+    process can be unblocked this way.
+    """
+    work = np.array(available, dtype=int)
+    allocation = np.array(allocation, dtype=int)
+    request = np.array(request, dtype=int)
+    finish = np.all(allocation == 0, axis=1)
+    preempted = np.zeros_like(work)
+    donated = np.zeros_like(allocation)
+
+    while True:
+        # Standard reduction until no unfinished process fits in work.
+        while True:
+            pending = np.flatnonzero(~finish)
+            ready = pending[np.all(request[pending] <= work, axis=1)]
+            if ready.size == 0:
+                break
+            work += allocation[ready].sum(axis=0)
+            finish[ready] = True
+        if finish.all():
+            break
+
+        shortfall = np.maximum(request[pending] - work, 0)
+        obtainable = allocation[pending].sum(axis=0) - allocation[pending]
+        feasible = np.all(shortfall <= obtainable, axis=1)
+        if not feasible.any():
+            return None
+        pick = int(np.argmin(np.where(feasible, shortfall.sum(axis=1), np.inf)))
+        deficit = shortfall[pick]
+        donors = np.delete(pending, pick)
+        for j in np.flatnonzero(deficit):
+            order = donors[np.argsort(-allocation[donors, j], kind='stable')]
+            held = allocation[order, j]
+            take = np.clip(deficit[j] - (np.cumsum(held) - held), 0, held)
+            allocation[order, j] -= take
+            request[order, j] += take
+            donated[order, j] += take
+        work += deficit
+        preempted += deficit
+
+    victims = np.flatnonzero(donated.any(axis=1))
+    return {
+        "preempted": preempted.tolist(),
+        "units": int(preempted.sum()),
+        "preemptions": [{"process": int(i), "units": donated[i].tolist()} for i in victims],
+        "new_allocation": allocation.tolist(),
+        "new_request": request.tolist()
+    }
@@ -0,0 +1,67 @@
+"""
+Production entry point for the Nexus API.
+
+    python serve.py --host 0.0.0.0 --port 5000 --workers 4 --threads 8
+
+Uses gunicorn when it is installed (Linux/macOS) and falls back to
+waitress (pure Python, works on Windows). Each gunicorn worker is a
+separate process with its own persistent wait-for graph, banker sessions,
+result cache and detector thread, so clients that rely on that state
+should use a single worker or sticky routing. Settings are read from
+NEXUS_* environment variables, see server.DEFAULT_CONFIG.
+"""
+import argparse
+import importlib
+import sys
+
+from server import create_app
+
+
+def serve_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class NexusApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{args.host}:{args.port}")
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            # SSE clients hold a connection open, keepalives arrive every 15s
+            self.cfg.set('timeout', 0)
+
+        def load(self):
+            return create_app()
+
+    NexusApplication().run()
+
+def serve_waitress(args):
+    from waitress import serve
+
+    if args.workers > 1:
+        print("waitress runs a single process; ignoring --workers", file=sys.stderr)
+    serve(create_app(), host=args.host, port=args.port, threads=args.threads)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Nexus API with a production WSGI server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=1, help="worker processes (gunicorn only)")
+    parser.add_argument('--threads', type=int, default=8, help="request threads per worker")
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'waitress'], default='auto')
+    args = parser.parse_args(argv)
+
+    # probe the module each backend actually needs; gunicorn imports but cannot run on Windows
+    servers = {'gunicorn': ('gunicorn.app.base', serve_gunicorn), 'waitress': ('waitress', serve_waitress)}
+    order = ['gunicorn', 'waitress'] if args.server == 'auto' else [args.server]
+    for name in order:
+        module, run = servers[name]
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        return run(args)
+    sys.exit("No production server found: pip install gunicorn (Linux/macOS) or waitress")
+
+
+if __name__ == '__main__':
+    main()
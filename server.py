@@ -1,138 +1,840 @@
-from flask import Flask, request, jsonify
+import json
+import logging
+import queue
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import numpy as np
-from deadlock_logic import Resource, Process, DeadlockGraph, BankersAlgorithm, MultiInstanceDetection
-from recovery import select_victim, simulate_recovery
+import threading
+from deadlock_logic import DeadlockGraph, IncrementalDeadlockGraph, BankersAlgorithm, MultiInstanceDetection
+from recovery import COST_FUNCTIONS, plan_preemption, plan_recovery, select_victim, simulate_recovery
+from sessions import BankerSessionStore
+from state_store import ObjectStateStore, ArrayStateStore
+from simulation import WaitForMonitor, iter_ndjson, stream_simulation
+from monitor import DeadlockMonitor, EventBus
+from cache import ResultCache, graph_key, matrix_key
+import distributed
+import metrics
+import sparse
+import wire
+from executor import BoundedExecutor, ExecutorBusy
 
 
-app = Flask(__name__)
-CORS(app)
+logger = logging.getLogger('nexus.server')
 
+api = Blueprint('api', __name__)
 
-@app.route('/api/simulate', methods=['POST'])
+DEFAULT_CONFIG = {
+    "LOG_LEVEL": "INFO",
+    "LOG_FORMAT": "text",           # "text" (key=value fields) or "json"
+    "HEAVY_THRESHOLD": 250_000,     # matrix cells above which work leaves the request thread
+    "HEAVY_GRAPH_THRESHOLD": 50_000,  # graph nodes + edges above which detection leaves the request thread
+    "HEAVY_WORKERS": 2,
+    "HEAVY_PENDING": 16,
+    "HEAVY_TIMEOUT": 120.0,
+    "MONITOR": True,
+    "METRICS": False,               # record latency/size histograms and serve /metrics
+    "SPARSE_MAX_DENSITY": 0.05,     # non-zero fraction at or below which matrices go to the CSR backend
+    "SPARSE_MIN_CELLS": 100_000,    # below this size dense is always fast enough
+    "CACHE_ENTRIES": 1024,
+    "CACHE_TTL": 300.0,
+    "CACHE_MAX_BYTES": 64 * 1024 * 1024
+}
+
+def create_app(config=None):
+    """
+    Application factory. Settings come from DEFAULT_CONFIG, then NEXUS_*
+    environment variables (e.g. NEXUS_LOG_LEVEL=DEBUG), then `config`.
+    """
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    app.config.from_prefixed_env('NEXUS')
+    app.config.update(config or {})
+    CORS(app)
+
+    configure_logging(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'])
+    app.extensions['heavy_executor'] = BoundedExecutor(app.config['HEAVY_WORKERS'], app.config['HEAVY_PENDING'])
+    result_cache.max_entries = app.config['CACHE_ENTRIES']
+    result_cache.ttl = app.config['CACHE_TTL']
+    result_cache.max_bytes = app.config['CACHE_MAX_BYTES']
+
+    app.register_blueprint(api)
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.register_error_handler(ExecutorBusy, _executor_busy)
+    app.register_error_handler(FutureTimeout, lambda e: (jsonify({"error": "Computation timed out"}), 504))
+    app.register_error_handler(wire.DecodeError, lambda e: (jsonify({"error": str(e)}), 400))
+    metrics.enable(app.config['METRICS'])
+    if app.config['MONITOR']:
+        detector.start()
+    return app
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Appends the record's `fields` (passed as extra={"fields": {...}}) as
+    key=value pairs, or renders the whole record as one JSON object.
+    """
+    def __init__(self, json_output=False):
+        super().__init__('%(asctime)s %(levelname)s %(name)s %(message)s')
+        self.json_output = json_output
+
+    def format(self, record):
+        fields = getattr(record, 'fields', {})
+        if self.json_output:
+            entry = {"time": self.formatTime(record), "level": record.levelname,
+                     "logger": record.name, "event": record.getMessage()}
+            entry.update(fields)
+            if record.exc_info:
+                entry["exc_info"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+        saved, record.exc_info, record.exc_text = record.exc_info, None, None
+        line = super().format(record) + ''.join(f" {key}={value}" for key, value in fields.items())
+        record.exc_info = saved
+        if saved:
+            line += '\n' + self.formatException(saved)
+        return line
+
+def configure_logging(level, fmt='text'):
+    root = logging.getLogger('nexus')
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        root.addHandler(handler)
+        root.propagate = False
+    for handler in root.handlers:
+        handler.setFormatter(StructuredFormatter(json_output=fmt == 'json'))
+
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+def _record_request(response):
+    if metrics.enabled or logger.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_SECONDS.observe(elapsed, rule, request.method, response.status_code)
+        logger.debug("request", extra={"fields": {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "ms": round(elapsed * 1e3, 3)
+        }})
+    return response
+
+def _executor_busy(error):
+    metrics.HTTP_REJECTED.inc()
+    return jsonify({"error": str(error)}), 503
+
+def _cells(matrix):
+    if isinstance(matrix, sparse.CSRMatrix):
+        return matrix.nnz
+    if isinstance(matrix, dict):
+        shape = matrix.get('shape') or (0, 0)
+        return shape[0] * shape[1]
+    return len(matrix) * len(matrix[0]) if matrix is not None and len(matrix) else 0
+
+def load_matrices(*matrices):
+    """
+    Dense ndarrays or sparse.CSRMatrix instances, whichever the measured
+    density of the inputs favours. Matrices may be sent as nested lists or
+    as CSR payloads ({"shape", "indptr", "indices", "data"}).
+    """
+    return sparse.as_backend(matrices, current_app.config['SPARSE_MAX_DENSITY'], current_app.config['SPARSE_MIN_CELLS'])
+
+def run_heavy(size, compute, threshold='HEAVY_THRESHOLD'):
+    """
+    Runs compute() inline for small inputs and on the bounded executor for
+    inputs at or above the `threshold` setting (matrix cells by default), so
+    slow large requests cannot occupy every server thread.
+    """
+    if size < current_app.config[threshold]:
+        return compute()
+    return current_app.extensions['heavy_executor'].run(compute, timeout=current_app.config['HEAVY_TIMEOUT'])
+
+# Matrix-valued fields sent as binary arrays when the client negotiates
+# the wire.MIMETYPE format.
+MATRIX_FIELDS = {'total', 'available', 'allocation', 'max_demand', 'request', 'need',
+                 'new_allocation', 'new_available', 'new_request', 'preempted'}
+
+def read_payload():
+    """
+    Request body as a dict. Binary bodies decode to zero-copy int32 array
+    views; everything else is parsed as JSON. A malformed binary body raises
+    wire.DecodeError, which the app answers with a 400.
+    """
+    if not metrics.enabled:
+        return wire.decode(request.get_data()) if request.mimetype == wire.MIMETYPE else request.json
+    start = time.perf_counter()
+    if request.mimetype == wire.MIMETYPE:
+        payload, fmt = wire.decode(request.get_data()), 'binary'
+    else:
+        payload, fmt = request.json, 'json'
+    metrics.HTTP_CODEC_SECONDS.observe(time.perf_counter() - start, 'decode', fmt)
+    return payload
+
+def _wants_binary():
+    accept = request.accept_mimetypes
+    return accept[wire.MIMETYPE] > accept['application/json']
+
+def respond(payload, status=200):
+    """
+    JSON by default; the binary array format when the client's Accept header
+    prefers it. ndarray values are encoded directly in either case.
+    """
+    start = time.perf_counter() if metrics.enabled else None
+    body = None
+    if _wants_binary():
+        arrays = {
+            name: value for name, value in payload.items()
+            if isinstance(value, np.ndarray) or (name in MATRIX_FIELDS and isinstance(value, list))
+        }
+        fields = {name: value for name, value in payload.items() if name not in arrays}
+        try:
+            body = wire.encode(fields, arrays)
+        except ValueError:
+            # Values the int32 format cannot hold go out as JSON instead.
+            logger.debug("binary encoding failed, answering with JSON", exc_info=True)
+    if body is not None:
+        response, fmt = Response(body, status=status, mimetype=wire.MIMETYPE), 'binary'
+    else:
+        response, fmt = jsonify({
+            name: value.tolist() if isinstance(value, np.ndarray) else value
+            for name, value in payload.items()
+        }), 'json'
+    if start is not None:
+        metrics.HTTP_CODEC_SECONDS.observe(time.perf_counter() - start, 'encode', fmt)
+    return response, status
+
+# Persistent wait-for graph updated edge by edge through /api/graph/edges.
+wait_for_graph = IncrementalDeadlockGraph()
+wait_for_graph_lock = threading.Lock()
+
+banker_sessions = BankerSessionStore()
+
+STATE_STORES = {"object": ObjectStateStore, "array": ArrayStateStore}
+
+# Results of the pure analysis endpoints, keyed by a hash of their inputs.
+result_cache = ResultCache(max_entries=1024, ttl=300.0, max_bytes=64 * 1024 * 1024)
+
+# Background detection over the persistent graph, Banker sessions and any
+# state pushed to /api/monitor/state; verdicts are published on event_bus.
+event_bus = EventBus()
+detector = DeadlockMonitor(event_bus)
+monitored_states = {}
+monitored_states_lock = threading.Lock()
+
+def _graph_snapshot():
+    with wait_for_graph_lock:
+        if not wait_for_graph.adjacency_list:
+            return {}
+        return {"graph": {"graph": {node: list(successors) for node, successors in wait_for_graph.adjacency_list.items()}}}
+
+def _session_snapshots():
+    snapshots = {}
+    for session in banker_sessions.sessions():
+        with session.lock:
+            snapshots[f"banker/{session.id}"] = {"banker": {
+                "total": session.banker.total_resources.copy(),
+                "max_demand": session.banker.max_demand.copy(),
+                "allocation": session.banker.allocation.copy()
+            }}
+    return snapshots
+
+def _pushed_snapshots():
+    with monitored_states_lock:
+        return dict(monitored_states)
+
+detector.register("graph", _graph_snapshot)
+detector.register("sessions", _session_snapshots)
+detector.register("pushed", _pushed_snapshots)
+
+
+@api.route('/api/simulate', methods=['POST'])
 def simulate():
+    if request.mimetype == 'application/x-ndjson':
+        return simulate_stream()
     data = request.json
     if data and 'resources' in data and 'steps' in data:
-        resources = {name: Resource(name, units) for name, units in data['resources'].items()}
-        processes = {name: Process(name) for name in data.get('processes', [])}
-        
+        backend = data.get('backend', 'object')
+        if backend not in STATE_STORES:
+            return jsonify({"error": f"Unknown backend: {backend}"}), 400
+        store = STATE_STORES[backend](data['resources'], data.get('processes', []))
+        success = store.replay(data['steps'])
+
+        monitor = WaitForMonitor(store.resource_totals())
         sim_steps = []
-        for step in data['steps']:
-            p_name = step['process']
-            r_name = step['resource']
-            units = step.get('units', 1)
-            
-            if p_name not in processes:
-                processes[p_name] = Process(p_name)
-            
-            p = processes[p_name]
-            r = resources[r_name]
-            success = p.request_resource(r, units)
-            sim_steps.append({"action": f"{p_name} requests {r_name}", "success": success})
-            
-        return jsonify({
+        for index, (step, ok) in enumerate(zip(data['steps'], success.tolist())):
+            monitor.observe(index, step['process'], step['resource'], ok, step.get('units', 1))
+            sim_steps.append({
+                "action": f"{step['process']} requests {step['resource']}",
+                "process": step['process'], "resource": step['resource'], "success": ok
+            })
+
+        wait_edges, hold_edges = monitor.edges()
+        result = {
             "steps": sim_steps,
-            "deadlock": data.get('expected_deadlock', True), 
-            "resources": {name: r.allocated_units for name, r in resources.items()},
-            "processes": {name: p.allocated_resources for name, p in processes.items()}
+            "resources": store.resource_usage(),
+            "processes": store.process_allocations(),
+            "wait_edges": wait_edges,
+            "hold_edges": hold_edges
+        }
+        result.update(monitor.report())
+        event_bus.publish({
+            "type": "wait_edges",
+            "source": "simulate",
+            "edges": wait_edges,
+            "deadlock": result["deadlock"]
         })
+        return jsonify(result)
 
     return jsonify({"error": "No simulation data provided"}), 400
 
-@app.route('/api/detect', methods=['POST'])
+def simulate_stream():
+    """
+    Streaming variant of /api/simulate. The body is NDJSON: a first line
+    {"resources": {...}, "processes": [...], "snapshot_every": N} followed by
+    one step per line. Results are streamed back as NDJSON events.
+    """
+    records = iter_ndjson(request.stream)
+    try:
+        config = next(records, None)
+    except ValueError:
+        config = None
+    if not config or 'resources' not in config:
+        return jsonify({"error": "No simulation data provided"}), 400
+    store = ObjectStateStore(config['resources'], config.get('processes', []))
+    snapshot_every = config.get('snapshot_every', 1000)
+
+    def generate():
+        try:
+            for event in stream_simulation(store, records, snapshot_every):
+                yield json.dumps(event) + '\n'
+        except (KeyError, ValueError) as e:
+            yield json.dumps({"type": "error", "error": f"Invalid step: {e}"}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@api.route('/api/detect', methods=['POST'])
 def detect():
     data = request.json
-    graph = DeadlockGraph()
-    for node in data.get('nodes', []):
-        graph.add_node(node)
-    for edge in data.get('edges', []):
-        graph.add_edge(edge[0], edge[1])
-    
-    is_deadlock = graph.detect_deadlock()
-    return jsonify({"deadlock": is_deadlock})
+    nodes = data.get('nodes', [])
+    edges = data.get('edges', [])
 
-@app.route('/api/detect/multi', methods=['POST'])
-def detect_multi():
+    def compute():
+        graph = DeadlockGraph()
+        for node in nodes:
+            graph.add_node(node)
+        for edge in edges:
+            graph.add_edge(edge[0], edge[1])
+        components, cycles = graph.find_deadlocks()
+        return {
+            "deadlock": len(components) > 0,
+            "components": components,
+            "cycles": cycles
+        }
+
+    size = len(nodes) + len(edges)
+    return jsonify(result_cache.get_or_compute(
+        graph_key('detect', nodes, edges), lambda: run_heavy(size, compute, 'HEAVY_GRAPH_THRESHOLD')))
+
+@api.route('/api/detect/distributed', methods=['POST'])
+def detect_distributed():
+    """
+    Sharded detection over the given edges. Shards run in this process and
+    the response reports cycles plus the probe traffic they exchanged;
+    `assignment` optionally pins nodes to shards.
+    """
+    data = request.json
+    edges = [(edge[0], edge[1]) for edge in data.get('edges', [])]
+    num_shards = data.get('shards', 4)
+    if not isinstance(num_shards, int) or num_shards < 1:
+        return jsonify({"error": "'shards' must be a positive integer"}), 400
+
+    def compute():
+        return run_heavy(len(edges), lambda: distributed.detect(edges, num_shards, data.get('assignment')),
+                         'HEAVY_GRAPH_THRESHOLD')
+
+    key = graph_key(f'detect/distributed/{num_shards}/{json.dumps(data.get("assignment"), sort_keys=True)}', [], edges)
+    return jsonify(result_cache.get_or_compute(key, compute))
+
+@api.route('/api/graph/edges', methods=['POST'])
+def graph_add_edges():
     data = request.json
+    results = []
+    with wait_for_graph_lock:
+        for edge in data.get('edges', []):
+            cycle = wait_for_graph.add_edge(edge[0], edge[1])
+            results.append({"edge": [edge[0], edge[1]], "cycle": cycle})
+        deadlock = wait_for_graph.detect_deadlock()
+    event_bus.publish({"type": "graph_diff", "added": [r["edge"] for r in results], "removed": [], "deadlock": deadlock})
+    return jsonify({"deadlock": deadlock, "edges": results})
+
+@api.route('/api/graph/edges', methods=['DELETE'])
+def graph_remove_edges():
+    data = request.json
+    with wait_for_graph_lock:
+        for edge in data.get('edges', []):
+            wait_for_graph.remove_edge(edge[0], edge[1])
+        deadlock = wait_for_graph.detect_deadlock()
+    event_bus.publish({"type": "graph_diff", "added": [], "removed": [list(edge[:2]) for edge in data.get('edges', [])], "deadlock": deadlock})
+    return jsonify({"deadlock": deadlock})
+
+@api.route('/api/graph', methods=['GET'])
+def graph_state():
+    with wait_for_graph_lock:
+        components, cycles = wait_for_graph.find_deadlocks()
+        edges = [[a, b] for a, successors in wait_for_graph.adjacency_list.items() for b in successors]
+    return jsonify({
+        "deadlock": len(components) > 0,
+        "components": components,
+        "cycles": cycles,
+        "edges": edges
+    })
+
+@api.route('/api/graph', methods=['DELETE'])
+def graph_reset():
+    global wait_for_graph
+    with wait_for_graph_lock:
+        wait_for_graph = IncrementalDeadlockGraph()
+    return jsonify({"deadlock": False})
+
+@api.route('/api/detect/multi', methods=['POST'])
+def detect_multi():
+    data = read_payload()
     # Expected: {available: [], allocation: [[]], request: [[]]}
     available = data.get('available')
-    allocation = data.get('allocation')
-    request_matrix = data.get('request')
+    try:
+        use_sparse, (allocation, request_matrix) = load_matrices(data.get('allocation'), data.get('request'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    print("--- DEBUG MULTI INSTANCE ---")
-    print(f"Available: {available}")
-    print(f"Allocation: {allocation}")
-    print(f"Request: {request_matrix}")
+    def compute():
+        detect = sparse.detect if use_sparse else MultiInstanceDetection.detect
+        deadlock, deadlocked_procs = detect(available, allocation, request_matrix)
+        logger.debug("detect_multi", extra={"fields": {
+            "processes": allocation.shape[0], "backend": "sparse" if use_sparse else "dense",
+            "deadlock": deadlock, "deadlocked": len(deadlocked_procs)
+        }})
+        return {
+            "deadlock": deadlock,
+            "deadlocked_processes": deadlocked_procs,
+            "backend": "sparse" if use_sparse else "dense"
+        }
 
-    deadlock, deadlocked_procs = MultiInstanceDetection.detect(available, allocation, request_matrix)
-    
-    print(f"Result: {deadlock}, Procs: {deadlocked_procs}")
-    
-    return jsonify({
-        "deadlock": deadlock,
-        "deadlocked_processes": deadlocked_procs
-    })
+    key = matrix_key('detect/multi', available, allocation, request_matrix)
+    return respond(result_cache.get_or_compute(key, lambda: run_heavy(_cells(allocation), compute)))
 
-@app.route('/api/banker/safe', methods=['POST'])
+@api.route('/api/banker/safe', methods=['POST'])
 def banker_safe():
-    data = request.json
+    data = read_payload()
     total = data.get('total')
-    max_demand = data.get('max_demand')
-    allocation = data.get('allocation')
+    try:
+        use_sparse, (max_demand, allocation) = load_matrices(data.get('max_demand'), data.get('allocation'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    banker = BankersAlgorithm(total, max_demand, allocation)
-    is_safe, sequence = banker.is_safe()
-    return jsonify({"safe": is_safe, "sequence": [f"P{i+1}" for i in sequence]})
+    def compute():
+        if use_sparse:
+            is_safe, sequence = sparse.is_safe(total, max_demand, allocation)
+        else:
+            is_safe, sequence = BankersAlgorithm(total, max_demand, allocation).is_safe()
+        return {
+            "safe": is_safe,
+            "sequence": [f"P{i+1}" for i in sequence],
+            "backend": "sparse" if use_sparse else "dense"
+        }
+
+    key = matrix_key('banker/safe', total, max_demand, allocation)
+    return respond(result_cache.get_or_compute(key, lambda: run_heavy(_cells(allocation), compute)))
 
-@app.route('/api/banker/request', methods=['POST'])
+@api.route('/api/banker/request', methods=['POST'])
 def banker_request():
     try:
-        data = request.json
+        data = read_payload()
         total = data.get('total')
         max_demand = data.get('max_demand')
         allocation = data.get('allocation')
         process_idx = data.get('process_idx')
         req_units = data.get('request')
         
-        print(f"=== BANKER REQUEST ===")
-        print(f"Total: {total}, Type: {type(total)}")
-        print(f"Allocation: {allocation}")
-        print(f"Process: {process_idx}, Request: {req_units}")
-        
         banker = BankersAlgorithm(total, max_demand, allocation)
-        granted, sequence = banker.request_resources(process_idx, req_units)
+        granted, sequence = run_heavy(_cells(allocation), lambda: banker.request_resources(process_idx, req_units))
+        logger.debug("banker_request", extra={"fields": {
+            "processes": len(banker.allocation), "process_idx": process_idx, "granted": granted
+        }})
         
-        print(f"Granted: {granted}, Sequence: {sequence}")
-        
-        return jsonify({
+        return respond({
             "granted": granted,
             "sequence": [f"P{i+1}" for i in sequence] if granted else [],
-            "new_allocation": banker.allocation.tolist() if granted else allocation,
-            "new_available": banker.available.tolist() if granted else None
+            "new_allocation": banker.allocation if granted else allocation,
+            "new_available": banker.available if granted else None
         })
+    except (ExecutorBusy, FutureTimeout, wire.DecodeError):
+        raise
     except Exception as e:
-        print(f"ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("banker_request failed")
         return jsonify({"error": str(e), "granted": False}), 500
 
-@app.route('/api/recovery', methods=['POST'])
-def recovery():
+def _batch_entries(data, banker):
+    """
+    (process_idx, request, priority) tuples from a batch payload. Raises
+    ValueError for entries that cannot be applied to `banker`, so a bad entry
+    fails the batch with a 400 before anything is granted.
+    """
+    requests = data.get('requests', [])
+    if not isinstance(requests, list):
+        raise ValueError("'requests' must be a list")
+    num_procs, num_res = banker.allocation.shape
+    entries = []
+    for k, entry in enumerate(requests):
+        if not isinstance(entry, dict) or 'process_idx' not in entry or 'request' not in entry:
+            raise ValueError(f"requests[{k}] must be an object with 'process_idx' and 'request'")
+        process_idx = entry['process_idx']
+        if isinstance(process_idx, bool) or not isinstance(process_idx, (int, np.integer)) or not 0 <= process_idx < num_procs:
+            raise ValueError(f"requests[{k}].process_idx must be an integer in [0, {num_procs})")
+        units = np.asarray(entry['request'])
+        if units.shape != (num_res,) or (units.size and units.dtype.kind not in 'iu'):
+            raise ValueError(f"requests[{k}].request must be {num_res} integers")
+        priority = entry.get('priority', 0)
+        if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+            raise ValueError(f"requests[{k}].priority must be a number")
+        entries.append((int(process_idx), units, priority))
+    return entries
+
+def _batch_results(entries, verdicts):
+    return [
+        {"process_idx": process_idx, "granted": verdict}
+        for (process_idx, _, _), verdict in zip(entries, verdicts)
+    ]
+
+@api.route('/api/banker/request/batch', methods=['POST'])
+def banker_request_batch():
+    data = read_payload()
+    banker = BankersAlgorithm(data.get('total'), data.get('max_demand'), data.get('allocation'))
+    try:
+        entries = _batch_entries(data, banker)
+        verdicts, sequence = run_heavy(_cells(banker.allocation), lambda: banker.request_batch(entries, mode=data.get('mode', 'greedy')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return respond({
+        "results": _batch_results(entries, verdicts),
+        "granted_count": sum(1 for verdict in verdicts if verdict),
+        "sequence": [f"P{i+1}" for i in sequence],
+        "new_allocation": banker.allocation,
+        "new_available": banker.available
+    })
+
+@api.route('/api/banker/session', methods=['POST'])
+def banker_session_create():
+    data = read_payload()
+    session = banker_sessions.create(data.get('total'), data.get('max_demand'), data.get('allocation'))
+    with session.lock:
+        is_safe, sequence = session.banker.is_safe()
+        state = session.state()
+    state.update({"safe": is_safe, "sequence": [f"P{i+1}" for i in sequence]})
+    return respond(state)
+
+def _publish_allocation_diff(session, changes):
+    """
+    Publishes the allocation cells touched by (process_idx, delta) changes so
+    dashboards can patch their copy instead of refetching the matrices.
+    Called with the session lock held.
+    """
+    cells = [
+        [int(process_idx), int(j), int(session.banker.allocation[process_idx, j])]
+        for process_idx, delta in changes
+        for j in np.flatnonzero(np.asarray(delta))
+    ]
+    if cells:
+        event_bus.publish({
+            "type": "allocation_diff",
+            "session": session.id,
+            "cells": cells,
+            "available": session.banker.available.tolist()
+        })
+
+@api.route('/api/banker/session/<session_id>', methods=['GET'])
+def banker_session_state(session_id):
+    session = banker_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    with session.lock:
+        state = session.state()
+    state["sequence"] = [f"P{i+1}" for i in state["sequence"]]
+    return jsonify(state)
+
+@api.route('/api/banker/session/<session_id>', methods=['DELETE'])
+def banker_session_delete(session_id):
+    if not banker_sessions.delete(session_id):
+        return jsonify({"error": "Unknown session"}), 404
+    return jsonify({"deleted": session_id})
+
+@api.route('/api/banker/session/<session_id>/request', methods=['POST'])
+def banker_session_request(session_id):
+    session = banker_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    data = request.json
+    process_idx = data.get('process_idx')
+    with session.lock:
+        granted, sequence = session.banker.request_resources(process_idx, data.get('request'))
+        if granted:
+            _publish_allocation_diff(session, [(process_idx, data.get('request'))])
+        row = session.banker.allocation[process_idx].tolist()
+        available = session.banker.available.tolist()
+    return jsonify({
+        "granted": granted,
+        "sequence": [f"P{i+1}" for i in sequence],
+        "process_idx": process_idx,
+        "allocation_row": row,
+        "available": available
+    })
+
+@api.route('/api/banker/session/<session_id>/request/batch', methods=['POST'])
+def banker_session_request_batch(session_id):
+    session = banker_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
+    data = request.json
+    with session.lock:
+        try:
+            entries = _batch_entries(data, session.banker)
+            verdicts, sequence = session.banker.request_batch(entries, mode=data.get('mode', 'greedy'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        granted_entries = [(process_idx, req) for (process_idx, req, _), verdict in zip(entries, verdicts) if verdict]
+        _publish_allocation_diff(session, granted_entries)
+        touched = sorted({process_idx for process_idx, _ in granted_entries})
+        rows = {str(i): session.banker.allocation[i].tolist() for i in touched}
+        available = session.banker.available.tolist()
+    return jsonify({
+        "results": _batch_results(entries, verdicts),
+        "granted_count": sum(1 for verdict in verdicts if verdict),
+        "sequence": [f"P{i+1}" for i in sequence],
+        "allocation_rows": rows,
+        "available": available
+    })
+
+@api.route('/api/banker/session/<session_id>/release', methods=['POST'])
+def banker_session_release(session_id):
+    session = banker_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown session"}), 404
     data = request.json
+    process_idx = data.get('process_idx')
+    with session.lock:
+        released = session.banker.release_resources(process_idx, data.get('release'))
+        if released:
+            _publish_allocation_diff(session, [(process_idx, data.get('release'))])
+        row = session.banker.allocation[process_idx].tolist()
+        available = session.banker.available.tolist()
+    return jsonify({
+        "released": released,
+        "process_idx": process_idx,
+        "allocation_row": row,
+        "available": available
+    })
+
+@api.route('/api/recovery', methods=['POST'])
+def recovery():
+    data = read_payload()
     processes = data.get('processes')
     allocation = data.get('allocation')
     max_demand = data.get('max_demand')
     resources = data.get('resources') or []
+    strategy = data.get('strategy', 'single')
+
+    if strategy in RECOVERY_PLANNERS:
+        if data.get('available') is None and data.get('total') is None:
+            return jsonify({"error": "Planning requires 'available' or 'total'"}), 400
+        if data.get('cost', 'heuristic') not in COST_FUNCTIONS:
+            return jsonify({"error": f"Unknown cost function: {data.get('cost')}"}), 400
+        result = run_heavy(_cells(allocation), lambda: RECOVERY_PLANNERS[strategy](data))
+        if result is None:
+            return jsonify({"error": "Preemption cannot resolve this deadlock"}), 409
+        return respond(result)
+    if strategy != 'single':
+        return jsonify({"error": f"Unknown strategy: {strategy}"}), 400
     
-    victim = select_victim(processes, allocation, max_demand, resources)
+    if not processes:
+        return jsonify({"error": "No victim found"}), 404
+    try:
+        use_sparse, (allocation_m, max_demand_m) = load_matrices(allocation, max_demand)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if use_sparse:
+        victim = sparse.select_victim(processes, allocation_m, max_demand_m)
+    else:
+        victim = select_victim(processes, allocation_m, max_demand_m, resources)
     if not victim:
         return jsonify({"error": "No victim found"}), 404
         
-    new_allocation = simulate_recovery(allocation, victim['index'])
-    return jsonify({
+    if isinstance(allocation, dict):
+        new_allocation = sparse.CSRMatrix.from_payload(allocation).without_rows([victim['index']]).to_payload()
+    else:
+        new_allocation = simulate_recovery(allocation, victim['index'])
+    return respond({
         "victim": victim,
         "new_allocation": new_allocation
     })
 
+def _dense_matrix(value):
+    # Planners search over dense matrices; CSR payloads are expanded first.
+    if isinstance(value, dict):
+        return sparse.CSRMatrix.from_payload(value).to_dense()
+    return np.array(value, dtype=int)
+
+def _recovery_state(data):
+    """
+    Current-state matrices for recovery planning. `available` may be given
+    directly or derived from `total`; pending requests default to the
+    remaining need (max_demand - allocation).
+    """
+    allocation = _dense_matrix(data['allocation'])
+    if data.get('available') is not None:
+        available = np.array(data['available'], dtype=int)
+    else:
+        available = np.array(data['total'], dtype=int) - allocation.sum(axis=0)
+    if data.get('request') is not None:
+        request_matrix = _dense_matrix(data['request'])
+    else:
+        request_matrix = _dense_matrix(data['max_demand']) - allocation
+    return available, allocation, request_matrix
+
+def recovery_plan(data):
+    processes = data.get('processes') or []
+    available, allocation, request_matrix = _recovery_state(data)
+    plan = plan_recovery(available, allocation, request_matrix, cost=data.get('cost', 'heuristic'))
+    victims = [
+        {"index": i, "name": _process_name(processes, i), "released": allocation[i].tolist()}
+        for i in plan['victims']
+    ]
+    return {
+        "strategy": "plan",
+        "victim": victims[0] if victims else None,
+        "victims": victims,
+        "processes_killed": len(victims),
+        "units_released": int(allocation[plan['victims']].sum()),
+        "cost": plan['cost'],
+        "optimal": plan['optimal'],
+        "steps": plan['steps'],
+        "new_allocation": plan['new_allocation']
+    }
+
+def recovery_preempt(data):
+    processes = data.get('processes') or []
+    plan = plan_preemption(*_recovery_state(data))
+    if plan is None:
+        return None
+    for preemption in plan['preemptions']:
+        preemption['name'] = _process_name(processes, preemption['process'])
+    plan.update({"strategy": "preempt", "units_preempted": plan.pop('units')})
+    return plan
+
+def recovery_compare(data):
+    preempt = recovery_preempt(data)
+    return {"strategy": "compare", "plan": recovery_plan(data), "preempt": preempt}
+
+def _process_name(processes, i):
+    return processes[i] if i < len(processes) else f"P{i+1}"
+
+RECOVERY_PLANNERS = {
+    "plan": recovery_plan,
+    "preempt": recovery_preempt,
+    "compare": recovery_compare
+}
+
+@api.route('/api/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(result_cache.stats())
+
+@api.route('/api/cache', methods=['DELETE'])
+def cache_clear():
+    result_cache.clear()
+    return jsonify(result_cache.stats())
+
+@api.route('/metrics', methods=['GET'])
+def metrics_exposition():
+    if not metrics.enabled:
+        return jsonify({"error": "Metrics are disabled; start the server with NEXUS_METRICS=true"}), 404
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/api/monitor', methods=['GET'])
+def monitor_status():
+    return jsonify(detector.status())
+
+def _monitor_snapshot(data):
+    """
+    Validated {"available", "allocation", "request"} snapshot. Raises
+    ValueError for missing keys or inconsistent shapes, which would otherwise
+    only fail later on the monitor thread.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    missing = [key for key in ('available', 'allocation', 'request') if key not in data]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    try:
+        snapshot = {key: np.array(data[key], dtype=int) for key in ('available', 'allocation', 'request')}
+    except (TypeError, ValueError):
+        raise ValueError("'available', 'allocation' and 'request' must be integer arrays") from None
+    available = snapshot['available']
+    if available.ndim != 1:
+        raise ValueError("'available' must be a vector")
+    for key in ('allocation', 'request'):
+        if snapshot[key].size == 0:
+            snapshot[key] = snapshot[key].reshape(0, len(available))
+        if snapshot[key].ndim != 2 or snapshot[key].shape[1] != len(available):
+            raise ValueError(f"'{key}' must be a matrix with one column per entry of 'available'")
+    if snapshot['allocation'].shape != snapshot['request'].shape:
+        raise ValueError("'allocation' and 'request' must have the same shape")
+    return snapshot
+
+@api.route('/api/monitor/state/<name>', methods=['POST'])
+def monitor_push_state(name):
+    try:
+        snapshot = _monitor_snapshot(request.json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    with monitored_states_lock:
+        monitored_states[name] = snapshot
+    if current_app.config['MONITOR']:
+        detector.start()
+    detector.poke()
+    return jsonify({"registered": name})
+
+@api.route('/api/monitor/state/<name>', methods=['DELETE'])
+def monitor_remove_state(name):
+    with monitored_states_lock:
+        removed = monitored_states.pop(name, None) is not None
+    if not removed:
+        return jsonify({"error": "Unknown state"}), 404
+    return jsonify({"removed": name})
+
+@api.route('/api/events', methods=['GET'])
+def events():
+    """
+    Server-sent events stream of detector verdicts and other published events.
+    """
+    if current_app.config['MONITOR']:
+        detector.start()
+    token, queue_ = event_bus.listen()
+
+    def generate():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = queue_.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(token)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    create_app({"LOG_LEVEL": "DEBUG"}).run(debug=True, port=5000, threaded=True)
@@ -0,0 +1,62 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from deadlock_logic import BankersAlgorithm
+
+
+class BankerSession:
+    """
+    A BankersAlgorithm instance kept in memory between requests, so clients
+    only send per-request deltas instead of the full matrices.
+    """
+    def __init__(self, session_id, banker):
+        self.id = session_id
+        self.banker = banker
+        self.lock = threading.Lock()
+
+    def state(self):
+        return {
+            "session_id": self.id,
+            "total": self.banker.total_resources.tolist(),
+            "max_demand": self.banker.max_demand.tolist(),
+            "allocation": self.banker.allocation.tolist(),
+            "available": self.banker.available.tolist(),
+            "sequence": self.banker.safe_sequence or [],
+            "request_paths": {"fast": self.banker.fast_path_hits, "slow": self.banker.slow_path_hits}
+        }
+
+
+class BankerSessionStore:
+    """
+    Sessions keyed by ID. Least recently used sessions are dropped once
+    `max_sessions` is exceeded.
+    """
+    def __init__(self, max_sessions=1024):
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, total, max_demand, allocation):
+        banker = BankersAlgorithm(total, max_demand, allocation)
+        session = BankerSession(uuid.uuid4().hex, banker)
+        with self._lock:
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions.values())
@@ -0,0 +1,203 @@
+import json
+
+import numpy as np
+
+from deadlock_logic import IncrementalDeadlockGraph, MultiInstanceDetection
+from state_store import ArrayStateStore
+
+
+def iter_ndjson(lines):
+    """
+    Lazily decodes newline-delimited JSON, skipping blank lines.
+    """
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+class WaitForMonitor:
+    """
+    Process wait-for graph kept in step with a replayed trace. A denied
+    request makes the process wait for every other current holder of the
+    resource, and a later grant of the same pair clears that wait; holders
+    that arrive while a process waits gain an edge from it too. Cycle checks
+    happen incrementally as each new edge is inserted, so the cost is
+    amortized per step instead of a full graph scan at the end.
+
+    With single-unit resources a cycle is a deadlock. When a cycle involves a
+    resource with more than one unit it is only a candidate: the verdict is
+    confirmed with a multi-instance reduction over the whole state. While the
+    graph stays cyclic and unconfirmed the reduction is repeated only on
+    steps that can change it: a denial, or a grant of a resource that some
+    process is waiting for. Allocation and outstanding requests are kept
+    in arrays updated per step, so a confirmation does not rebuild them.
+    """
+    def __init__(self, resources):
+        self.totals = dict(resources)
+        # Mirrors the grants: they were admitted by the same free-units rule.
+        self.state = ArrayStateStore(resources)
+        self.requests = np.zeros_like(self.state.allocation)
+        self.graph = IncrementalDeadlockGraph()
+        self.holders = {}
+        self.waiting = {}
+        self.waiters = {}
+        self.reasons = {}
+        self.deadlock_step = None
+        self.cycle = []
+        self.deadlocked_processes = []
+
+    def observe(self, index, process, resource, success, units=1):
+        """
+        Records one step and returns the cycle if this step confirmed a
+        deadlock, otherwise an empty list.
+        """
+        self.graph.add_node(process)
+        row = self.state.add_process(process)
+        if len(self.requests) < len(self.state.allocation):
+            grown = np.zeros_like(self.state.allocation)
+            grown[:len(self.requests)] = self.requests
+            self.requests = grown
+        column = self.state.resource_index[resource]
+        cycle = []
+        if success:
+            self.state.request(process, resource, units)
+            self.requests[row, column] = 0
+            pending = self.waiting.get(process, {})
+            if pending.pop(resource, None) is not None:
+                self.waiters[resource].discard(process)
+                for holder in self.holders.get(resource, {}):
+                    self._drop_wait(process, holder, resource)
+            held = self.holders.setdefault(resource, {})
+            if process not in held:
+                held[process] = 0
+                for waiter in self.waiters.get(resource, ()):
+                    cycle = self._add_wait(waiter, process, resource) or cycle
+            held[process] += units
+        else:
+            pending = self.waiting.setdefault(process, {})
+            if resource not in pending:
+                self.waiters.setdefault(resource, set()).add(process)
+                for holder in self.holders.get(resource, {}):
+                    cycle = self._add_wait(process, holder, resource) or cycle
+            pending[resource] = units
+            self.requests[row, column] = units
+
+        if self.deadlock_step is not None:
+            return []
+        if not cycle:
+            # A grant nobody waits for leaves every waiter's chances unchanged.
+            if success and not self.waiters.get(resource):
+                return []
+            if not self.graph.detect_deadlock():
+                return []
+            # Re-adding an existing cycle edge returns its current witness.
+            cycle = self.graph.add_edge(*next(iter(self.graph.cycle_edges)))
+        deadlocked = self._confirm(cycle)
+        if not deadlocked:
+            return []
+        self.deadlock_step = index
+        self.cycle = self._with_resources(cycle)
+        self.deadlocked_processes = deadlocked
+        return self.cycle
+
+    def _add_wait(self, waiter, holder, resource):
+        if waiter == holder:
+            return []
+        reasons = self.reasons.setdefault((waiter, holder), {})
+        reasons[resource] = None
+        if len(reasons) > 1:
+            # The edge is already in the graph for another resource.
+            return []
+        return self.graph.add_edge(waiter, holder)
+
+    def _drop_wait(self, waiter, holder, resource):
+        reasons = self.reasons.get((waiter, holder))
+        if reasons is None or resource not in reasons:
+            return
+        del reasons[resource]
+        if not reasons:
+            del self.reasons[(waiter, holder)]
+            self.graph.remove_edge(waiter, holder)
+
+    def _cycle_resources(self, cycle):
+        return {
+            resource
+            for waiter, holder in zip(cycle, cycle[1:] + cycle[:1])
+            for resource in self.reasons.get((waiter, holder), ())
+        }
+
+    def _confirm(self, cycle):
+        """Deadlocked processes if the cycle is a real deadlock, else []."""
+        if all(self.totals[resource] == 1 for resource in self._cycle_resources(cycle)):
+            return list(cycle)
+        state = self.state
+        count = len(state.process_names)
+        deadlock, rows = MultiInstanceDetection.detect(
+            state.totals - state.allocated, state.allocation[:count], self.requests[:count]
+        )
+        return sorted((state.process_names[i] for i in rows), key=str) if deadlock else []
+
+    def _with_resources(self, cycle):
+        # Report the cycle as process, resource waited for, next process, ...
+        named = []
+        for waiter, holder in zip(cycle, cycle[1:] + cycle[:1]):
+            named.extend([waiter, next(iter(self.reasons[(waiter, holder)]))])
+        return named
+
+    def edges(self):
+        """
+        Current edges as [process, resource] waits and [resource, process]
+        holds, so clients can draw the graph without parsing step actions.
+        """
+        wait_edges = [[process, resource] for process, pending in self.waiting.items() for resource in pending]
+        hold_edges = [[resource, process] for resource, held in self.holders.items() for process in held]
+        return wait_edges, hold_edges
+
+    def report(self):
+        return {
+            "deadlock": self.deadlock_step is not None,
+            "deadlock_step": self.deadlock_step,
+            "deadlocked_processes": self.deadlocked_processes,
+            "cycle": self.cycle
+        }
+
+
+def stream_simulation(store, steps, snapshot_every=1000):
+    """
+    Replays steps one at a time against a state store and yields result
+    events: one "step" event per step, a "deadlock" event the first time the
+    wait-for graph closes a cycle, a "snapshot" of resource and process state
+    every `snapshot_every` steps, and a closing "summary". Only the store and
+    the wait-for graph are kept, so memory does not grow with the number of
+    steps replayed.
+    """
+    monitor = WaitForMonitor(store.resource_totals())
+    index = -1
+    granted = 0
+    for index, step in enumerate(steps):
+        p_name = step['process']
+        r_name = step['resource']
+        units = step.get('units', 1)
+        success = store.request(p_name, r_name, units)
+        granted += success
+        yield {
+            "type": "step", "index": index, "action": f"{p_name} requests {r_name}",
+            "process": p_name, "resource": r_name, "success": success
+        }
+        if monitor.observe(index, p_name, r_name, success, units):
+            yield dict(monitor.report(), type="deadlock")
+        if snapshot_every and (index + 1) % snapshot_every == 0:
+            yield snapshot_event(store, index)
+    summary = dict(snapshot_event(store, index), type="summary", granted=granted, denied=index + 1 - granted)
+    summary.update(monitor.report())
+    yield summary
+
+
+def snapshot_event(store, index):
+    return {
+        "type": "snapshot",
+        "step": index,
+        "resources": store.resource_usage(),
+        "processes": store.process_allocations()
+    }
@@ -0,0 +1,257 @@
+"""
+Compressed sparse row (CSR) matrices for large systems in which each
+process touches only a few resource types, and the detection, safety and
+victim-scoring algorithms working on them directly.
+
+The algorithms keep, per resource, the stored demands sorted by value and
+a pointer past the ones the current work vector covers, plus a count per
+process of the resources still blocking it. Finishing a process only adds
+its stored allocation entries to `work` and advances the pointers of those
+resources, so each row costs O(nnz) rather than O(m). Results match the
+dense implementations in deadlock_logic.py, including the exact safe
+sequence produced by BankersAlgorithm.is_safe.
+"""
+import heapq
+
+import numpy as np
+
+from deadlock_logic import BankersAlgorithm, MultiInstanceDetection, _as_int_array
+
+
+class CSRMatrix:
+    """
+    Integer matrix stored as row pointers, column indices and values, with
+    no explicit zeros. Column indices are sorted within each row.
+    """
+    __slots__ = ('shape', 'indptr', 'indices', 'data')
+
+    def __init__(self, shape, indptr, indices, data):
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.int64)
+
+    @classmethod
+    def from_dense(cls, array):
+        array = np.asarray(array, dtype=np.int64)
+        if array.ndim != 2:
+            array = array.reshape(len(array), -1)
+        rows, cols = np.nonzero(array)
+        indptr = np.zeros(array.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=array.shape[0]), out=indptr[1:])
+        return cls(array.shape, indptr, cols, array[rows, cols])
+
+    @classmethod
+    def from_coo(cls, shape, rows, cols, values):
+        """Builds a matrix from (row, col, value) triples, summing duplicates and dropping zeros."""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=np.int64)
+        order = np.lexsort((cols, rows))
+        rows, cols, values = rows[order], cols[order], values[order]
+        if rows.size:
+            starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])])
+            rows, cols, values = rows[starts], cols[starts], np.add.reduceat(values, starts)
+            kept = values != 0
+            rows, cols, values = rows[kept], cols[kept], values[kept]
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(shape, indptr, cols, values)
+
+    @classmethod
+    def from_payload(cls, payload):
+        """
+        Parses the JSON form {"shape": [n, m], "indptr": [...], "indices":
+        [...], "data": [...]}; entries are normalized through from_coo so
+        unsorted or duplicate entries are accepted.
+        """
+        try:
+            n, m = (int(size) for size in payload['shape'])
+            indptr = np.asarray(payload['indptr'], dtype=np.int64)
+            indices = np.asarray(payload['indices'], dtype=np.int64)
+            data = np.asarray(payload['data'], dtype=np.int64)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid sparse matrix: {e}") from e
+        if (indptr.shape != (n + 1,) or indptr[0] != 0 or np.any(np.diff(indptr) < 0)
+                or indptr[-1] != indices.size or indices.size != data.size):
+            raise ValueError("Invalid sparse matrix: inconsistent indptr/indices/data")
+        if indices.size and (indices.min() < 0 or indices.max() >= m):
+            raise ValueError("Invalid sparse matrix: column index out of range")
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        return cls.from_coo((n, m), rows, indices, data)
+
+    def to_payload(self):
+        return {
+            "shape": list(self.shape),
+            "indptr": self.indptr.tolist(),
+            "indices": self.indices.tolist(),
+            "data": self.data.tolist()
+        }
+
+    def to_dense(self):
+        dense = np.zeros(self.shape, dtype=np.int64)
+        dense[self.row_ids(), self.indices] = self.data
+        return dense
+
+    @property
+    def nnz(self):
+        return int(self.data.size)
+
+    def row_ids(self):
+        return np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self.indptr))
+
+    def row(self, i):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        dense = np.zeros(self.shape[1], dtype=np.int64)
+        dense[self.indices[start:end]] = self.data[start:end]
+        return dense
+
+    def row_sums(self):
+        sums = np.zeros(self.shape[0], dtype=np.int64)
+        np.add.at(sums, self.row_ids(), self.data)
+        return sums
+
+    def column_sums(self):
+        sums = np.zeros(self.shape[1], dtype=np.int64)
+        np.add.at(sums, self.indices, self.data)
+        return sums
+
+    def without_rows(self, rows):
+        """Copy with the given rows emptied (e.g. a terminated process's allocation)."""
+        keep = np.ones(self.shape[0], dtype=bool)
+        keep[np.asarray(rows, dtype=np.int64)] = False
+        entries = np.repeat(keep, np.diff(self.indptr))
+        indptr = np.zeros_like(self.indptr)
+        np.cumsum(np.diff(self.indptr) * keep, out=indptr[1:])
+        return CSRMatrix(self.shape, indptr, self.indices[entries], self.data[entries])
+
+    def __sub__(self, other):
+        if self.shape != other.shape:
+            raise ValueError(f"Shape mismatch: {self.shape} vs {other.shape}")
+        return CSRMatrix.from_coo(
+            self.shape,
+            np.concatenate([self.row_ids(), other.row_ids()]),
+            np.concatenate([self.indices, other.indices]),
+            np.concatenate([self.data, -other.data])
+        )
+
+
+def as_backend(matrices, max_density=0.05, min_cells=100_000):
+    """
+    Loads each matrix (nested lists, ndarray or CSR payload dict) and picks
+    the representation by measured density: all CSRMatrix when the inputs
+    together have at least `min_cells` cells and at most `max_density` of
+    them are non-zero, otherwise all dense ndarrays. Integer arrays are kept
+    as they arrive (e.g. the read-only int32 views wire.decode produces) and
+    only widened when converted to CSR. Empty inputs load as (0, m) with m
+    taken from the other matrices. Returns (use_sparse, matrices).
+    """
+    if any(m is None for m in matrices):
+        raise ValueError("Missing matrix")
+    loaded = [CSRMatrix.from_payload(m) if isinstance(m, dict) else _as_int_array(m) for m in matrices]
+    # An empty matrix ([] or [[]]) has no rows; its width comes from the others.
+    width = next((m.shape[1] for m in loaded if len(m.shape) == 2 and m.shape[1]), 0)
+    loaded = [m.reshape(0, width) if isinstance(m, np.ndarray) and m.size == 0 else m for m in loaded]
+    if any(m.ndim != 2 for m in loaded if isinstance(m, np.ndarray)):
+        raise ValueError("Matrices must be two-dimensional")
+    cells = sum(m.shape[0] * m.shape[1] if isinstance(m, CSRMatrix) else m.size for m in loaded)
+    nonzero = sum(m.nnz if isinstance(m, CSRMatrix) else np.count_nonzero(m) for m in loaded)
+    if cells >= min_cells and nonzero <= max_density * cells:
+        return True, [m if isinstance(m, CSRMatrix) else CSRMatrix.from_dense(m) for m in loaded]
+    return False, [m.to_dense() if isinstance(m, CSRMatrix) else m for m in loaded]
+
+
+def _reduce(work, demand, allocation, finish):
+    """
+    Releases processes in the same order as the dense row-by-row scan: the
+    next process is the lowest-numbered ready one after the last finished,
+    and processes that become ready behind it wait for the next pass.
+    Rows become ready when their blocking count drops to zero. Updates
+    `finish` in place and returns (sequence, work).
+    """
+    num_rows, num_res = demand.shape
+    rows, cols, values = demand.row_ids(), demand.indices, demand.data
+    by_column = np.lexsort((values, cols))
+    rows, cols, values = rows[by_column], cols[by_column], values[by_column]
+    bounds = np.searchsorted(cols, np.arange(num_res + 1))
+    # Pointer per resource past the stored demands the work vector covers.
+    pointer = bounds[:-1].copy()
+    for c in np.flatnonzero(bounds[1:] > bounds[:-1]):
+        pointer[c] += np.searchsorted(values[bounds[c]:bounds[c + 1]], work[c], side='right')
+    blocked = np.bincount(rows[values > work[cols]], minlength=num_rows)
+
+    column_rows, column_values = rows.tolist(), values.tolist()
+    end, pointer = bounds[1:].tolist(), pointer.tolist()
+    indptr, indices, data = allocation.indptr.tolist(), allocation.indices.tolist(), allocation.data.tolist()
+    blocked, done, work = blocked.tolist(), finish.tolist(), work.tolist()
+
+    current = [i for i in range(num_rows) if blocked[i] == 0 and not done[i]]
+    upcoming = []
+    cursor = -1
+    sequence = []
+    while True:
+        if not current:
+            if not upcoming:
+                break
+            current, upcoming, cursor = upcoming, [], -1
+            heapq.heapify(current)
+        i = heapq.heappop(current)
+        done[i] = True
+        sequence.append(i)
+        cursor = i
+        for k in range(indptr[i], indptr[i + 1]):
+            c = indices[k]
+            w = work[c] + data[k]
+            work[c] = w
+            p, stop = pointer[c], end[c]
+            while p < stop and column_values[p] <= w:
+                r = column_rows[p]
+                blocked[r] -= 1
+                if blocked[r] == 0 and not done[r]:
+                    heapq.heappush(current if r > cursor else upcoming, r)
+                p += 1
+            pointer[c] = p
+    finish[:] = done
+    return sequence, np.array(work, dtype=np.int64)
+
+def _supported(work, allocation):
+    # Implicit zeros are only satisfied by non-negative work, and pointers
+    # only move forward while allocations are non-negative.
+    return not np.any(work < 0) and not np.any(allocation.data < 0)
+
+def detect(available, allocation, request):
+    """Sparse MultiInstanceDetection.detect: returns (deadlock, deadlocked process indices)."""
+    work = np.array(available, dtype=np.int64)
+    if allocation.shape[0] == 0:
+        return False, []
+    if not _supported(work, allocation):
+        return MultiInstanceDetection.detect(work, allocation.to_dense(), request.to_dense())
+    finish = np.diff(allocation.indptr) == 0
+    _reduce(work, request, allocation, finish)
+    deadlocked_procs = np.flatnonzero(~finish).tolist()
+    return len(deadlocked_procs) > 0, deadlocked_procs
+
+def is_safe(total, max_demand, allocation):
+    """Sparse BankersAlgorithm(total, max_demand, allocation).is_safe()."""
+    available = np.array(total, dtype=np.int64) - allocation.column_sums()
+    if not _supported(available, allocation):
+        return BankersAlgorithm(total, max_demand.to_dense(), allocation.to_dense()).is_safe()
+    finish = np.zeros(allocation.shape[0], dtype=bool)
+    sequence, _ = _reduce(available, max_demand - allocation, allocation, finish)
+    if finish.all():
+        return True, sequence
+    return False, []
+
+def select_victim(processes, allocation, max_demand):
+    """Sparse recovery.select_victim: same heuristic, scored from row sums in O(nnz)."""
+    if not processes:
+        return None
+    allocated_total = allocation.row_sums()
+    need_total = max_demand.row_sums() - allocated_total
+    costs = allocated_total / (need_total + 1)
+    victim_idx = int(np.argmax(costs[:len(processes)]))
+    return {
+        "index": victim_idx,
+        "name": processes[victim_idx],
+        "released": allocation.row(victim_idx).tolist()
+    }
@@ -1,10 +1,29 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { Shield, Activity, Share2, Layers, Play, RefreshCw, TriangleAlert, CircleCheck } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 
 const API_BASE = 'http://localhost:5000/api';
 
+// Matrix tables only mount the rows in view, so thousands of processes do
+// not mean thousands of rows of inputs.
+const ROW_HEIGHT = 34;
+const TABLE_HEIGHT = 340;
+const OVERSCAN = 6;
+
+function useVirtualRows(count, rowHeight = ROW_HEIGHT, height = TABLE_HEIGHT) {
+  const [scrollTop, setScrollTop] = useState(0);
+  const start = Math.min(count, Math.max(0, Math.floor(scrollTop / rowHeight) - OVERSCAN));
+  const end = Math.min(count, Math.ceil((scrollTop + height) / rowHeight) + OVERSCAN);
+  return {
+    start,
+    end,
+    padTop: start * rowHeight,
+    padBottom: (count - end) * rowHeight,
+    onScroll: e => setScrollTop(e.currentTarget.scrollTop)
+  };
+}
+
 function App() {
   const [logs, setLogs] = useState([{ type: 'info', text: 'System initialized. Ready for simulation.' }]);
 
@@ -27,11 +46,69 @@ function App() {
     [0, 0, 0], [0, 0, 0], [0, 0, 0], [0, 0, 0], [0, 0, 0]
   ]);
 
+  // Server-side Banker session mirroring bankerMatrices; requests send only
+  // deltas and allocation changes arrive as cell patches over /api/events.
+  const sessionRef = useRef(null);
+
   const addLog = (text, type = 'info') => {
     setLogs(prev => [...prev, { type, text, time: new Date().toLocaleTimeString() }].slice(-10));
   };
 
+  const applyAllocationCells = (cells) => {
+    setBankerMatrices(prev => {
+      const allocation = [...prev.allocation];
+      cells.forEach(([i, j, val]) => {
+        if (!allocation[i]) return;
+        if (allocation[i] === prev.allocation[i]) allocation[i] = [...allocation[i]];
+        allocation[i][j] = val;
+      });
+      return { ...prev, allocation };
+    });
+  };
+
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE}/events`);
+    source.addEventListener('allocation_diff', e => {
+      const diff = JSON.parse(e.data);
+      if (diff.session === sessionRef.current) applyAllocationCells(diff.cells);
+    });
+    source.addEventListener('detector', e => {
+      const verdict = JSON.parse(e.data);
+      if (verdict.removed) return;
+      if (verdict.safe === false) {
+        addLog(`Detector [${verdict.source}]: UNSAFE state`, 'warning');
+        return;
+      }
+      addLog(`Detector [${verdict.source}]: ${verdict.deadlock ? `DEADLOCK (${verdict.processes.join(', ')})` : 'clear'}`, verdict.deadlock ? 'error' : 'success');
+    });
+    source.addEventListener('wait_edges', e => {
+      const update = JSON.parse(e.data);
+      if (update.edges.length) addLog(`New wait edges: ${update.edges.map(([p, r]) => `${p}→${r}`).join(', ')}`, 'warning');
+    });
+    return () => source.close();
+  }, []);
+
+  const invalidateSession = () => {
+    if (sessionRef.current) {
+      axios.delete(`${API_BASE}/banker/session/${sessionRef.current}`).catch(() => {});
+      sessionRef.current = null;
+    }
+  };
+
+  const ensureSession = async () => {
+    if (!sessionRef.current) {
+      const res = await axios.post(`${API_BASE}/banker/session`, {
+        total: Object.values(resources),
+        max_demand: bankerMatrices.max_demand,
+        allocation: bankerMatrices.allocation
+      });
+      sessionRef.current = res.data.session_id;
+    }
+    return sessionRef.current;
+  };
+
   const syncAddResource = () => {
+    invalidateSession();
     // Generate next ID based on existing keys logic
     const resKeys = Object.keys(resources).sort();
     const lastKey = resKeys[resKeys.length - 1] || 'R0';
@@ -46,6 +123,7 @@ function App() {
   };
 
   const syncRemoveResource = (name) => {
+    invalidateSession();
     const resKeys = Object.keys(resources);
     const resIdx = resKeys.indexOf(name);
     if (resIdx === -1) return;
@@ -64,6 +142,7 @@ function App() {
   };
 
   const syncAddProcess = () => {
+    invalidateSession();
     const nextId = processes.length + 1;
     const name = `P${nextId}`;
     setProcesses(prev => [...prev, name]);
@@ -76,6 +155,7 @@ function App() {
   };
 
   const syncRemoveProcess = (name) => {
+    invalidateSession();
     const procIdx = processes.indexOf(name);
     if (procIdx === -1) return;
 
@@ -90,16 +170,24 @@ function App() {
   };
 
   const updateResourceUnits = (name, units) => {
+    invalidateSession();
     setResources(prev => ({ ...prev, [name]: Number(units) }));
   };
 
   const updateBankerMatrix = (type, row, col, val) => {
+    invalidateSession();
     const newMatrix = [...bankerMatrices[type]];
     newMatrix[row] = [...newMatrix[row]];
     newMatrix[row][col] = Number(val);
     setBankerMatrices(prev => ({ ...prev, [type]: newMatrix }));
   };
 
+  // Replaces the whole allocation matrix in one state update.
+  const replaceAllocation = (allocation) => {
+    invalidateSession();
+    setBankerMatrices(prev => ({ ...prev, allocation: allocation.map(row => row.map(Number)) }));
+  };
+
   return (
     <div className="app-container">
       <div className="centered-dashboard">
@@ -160,7 +248,7 @@ function App() {
               resources={resources}
               processes={processes}
               bankerMatrices={bankerMatrices}
-              updateBankerMatrix={updateBankerMatrix}
+              replaceAllocation={replaceAllocation}
             />
           </section>
           <section className="card">
@@ -170,6 +258,8 @@ function App() {
               processes={processes}
               bankerMatrices={bankerMatrices}
               updateBankerMatrix={updateBankerMatrix}
+              ensureSession={ensureSession}
+              applyAllocationCells={applyAllocationCells}
             />
           </section>
         </div>
@@ -227,6 +317,9 @@ function SimulationPhase({ addLog, resources, processes, simSteps, setSimSteps,
       res.data.steps.forEach(step => {
         addLog(`${step.action}: ${step.success ? 'SUCCESS' : 'DENIED'}`, step.success ? 'success' : 'error');
       });
+      if (res.data.deadlock) {
+        addLog(`Deadlock at step ${res.data.deadlock_step + 1}: ${res.data.deadlocked_processes.join(', ')}`, 'error');
+      }
     } catch (err) {
       addLog('Simulation failed.', 'error');
     }
@@ -271,8 +364,9 @@ function SimulationPhase({ addLog, resources, processes, simSteps, setSimSteps,
   );
 }
 
-function BankersPhase({ addLog, resources, processes, bankerMatrices, updateBankerMatrix }) {
+function BankersPhase({ addLog, resources, processes, bankerMatrices, updateBankerMatrix, ensureSession, applyAllocationCells }) {
   const [safeStatus, setSafeStatus] = useState(null);
+  const rows = useVirtualRows(processes.length);
   const [requestProcess, setRequestProcess] = useState(0);
   const [requestUnits, setRequestUnits] = useState(Array(Object.keys(resources).length).fill(0));
 
@@ -296,17 +390,14 @@ function BankersPhase({ addLog, resources, processes, bankerMatrices, updateBank
 
   const submitRequest = async () => {
     try {
-      const res = await axios.post(`${API_BASE}/banker/request`, {
-        total: Object.values(resources),
-        max_demand: bankerMatrices.max_demand,
-        allocation: bankerMatrices.allocation,
+      const sessionId = await ensureSession();
+      const res = await axios.post(`${API_BASE}/banker/session/${sessionId}/request`, {
         process_idx: requestProcess,
         request: requestUnits
       });
       if (res.data.granted) {
-        res.data.new_allocation.forEach((row, i) => {
-          row.forEach((val, j) => updateBankerMatrix('allocation', i, j, val));
-        });
+        // Same cells also arrive as an allocation_diff event; patches are idempotent.
+        applyAllocationCells(res.data.allocation_row.map((val, j) => [requestProcess, j, val]));
         addLog(`Request GRANTED for P${requestProcess + 1}. Safe Sequence: ${res.data.sequence.join(' → ')}`, 'success');
         setRequestUnits(Array(Object.keys(resources).length).fill(0));
       } else {
@@ -321,20 +412,25 @@ function BankersPhase({ addLog, resources, processes, bankerMatrices, updateBank
   return (
     <section>
       <h2><Shield size={20} /> Phase 3: Avoidance</h2>
-      <div style={{ overflowX: 'auto' }}>
+      <div style={{ overflow: 'auto', maxHeight: TABLE_HEIGHT }} onScroll={rows.onScroll}>
         <table className="grid-table compact-table">
           <thead>
             <tr><th>Proc</th><th>Max Demand</th><th>Alloc</th><th>Need</th></tr>
           </thead>
           <tbody>
-            {processes.map((pName, i) => (
-              <tr key={pName}>
-                <td>{pName}</td>
-                <td><div style={{ display: 'flex', gap: '2px' }}>{bankerMatrices.max_demand[i].map((v, j) => <input key={j} type="number" className="compact" value={v} onChange={e => updateBankerMatrix('max_demand', i, j, e.target.value)} />)}</div></td>
-                <td><div style={{ display: 'flex', gap: '2px' }}>{bankerMatrices.allocation[i].map((v, j) => <input key={j} type="number" className="compact" value={v} onChange={e => updateBankerMatrix('allocation', i, j, e.target.value)} />)}</div></td>
-                <td><span style={{ fontSize: '10px' }}>{bankerMatrices.max_demand[i].map((m, j) => m - bankerMatrices.allocation[i][j]).join(',')}</span></td>
-              </tr>
-            ))}
+            {rows.padTop > 0 && <tr style={{ height: rows.padTop }} />}
+            {processes.slice(rows.start, rows.end).map((pName, k) => {
+              const i = rows.start + k;
+              return (
+                <tr key={pName} style={{ height: ROW_HEIGHT }}>
+                  <td>{pName}</td>
+                  <td><div style={{ display: 'flex', gap: '2px' }}>{bankerMatrices.max_demand[i].map((v, j) => <input key={j} type="number" className="compact" value={v} onChange={e => updateBankerMatrix('max_demand', i, j, e.target.value)} />)}</div></td>
+                  <td><div style={{ display: 'flex', gap: '2px' }}>{bankerMatrices.allocation[i].map((v, j) => <input key={j} type="number" className="compact" value={v} onChange={e => updateBankerMatrix('allocation', i, j, e.target.value)} />)}</div></td>
+                  <td><span style={{ fontSize: '10px' }}>{bankerMatrices.max_demand[i].map((m, j) => m - bankerMatrices.allocation[i][j]).join(',')}</span></td>
+                </tr>
+              );
+            })}
+            {rows.padBottom > 0 && <tr style={{ height: rows.padBottom }} />}
             <tr style={{ background: 'rgba(25, 212, 191, 0.1)' }}>
               <td style={{ fontWeight: 'bold' }}>Available</td>
               <td colSpan="3">
@@ -394,7 +490,7 @@ function BankersPhase({ addLog, resources, processes, bankerMatrices, updateBank
   );
 }
 
-function DetectionPhase({ addLog, simulationResult, resources, processes, bankerMatrices, updateBankerMatrix }) {
+function DetectionPhase({ addLog, simulationResult, resources, processes, bankerMatrices, replaceAllocation }) {
   const [deadlockState, setDeadlockState] = useState(null);
   const [graphData, setGraphData] = useState({ nodes: [], edges: [] });
   const [recoveryData, setRecoveryData] = useState(null);
@@ -415,22 +511,9 @@ function DetectionPhase({ addLog, simulationResult, resources, processes, banker
     Object.keys(resources).forEach(r => nodes.push({ id: r, type: 'resource' }));
     Object.keys(simulationResult.processes).forEach(p => nodes.push({ id: p, type: 'process' }));
 
-    Object.entries(simulationResult.processes).forEach(([pName, allocations]) => {
-      Object.entries(allocations).forEach(([rName, units]) => {
-        if (units > 0) edges.push({ from: rName, to: pName, type: 'allocation' });
-      });
-    });
-
-    simulationResult.steps.forEach(step => {
-      if (!step.success) {
-        const parts = step.action.split(' ');
-        if (parts.length >= 3) {
-          const pName = parts[0];
-          const rName = parts[2];
-          edges.push({ from: pName, to: rName, type: 'request' });
-        }
-      }
-    });
+    // The server reports both edge kinds as [from, to] pairs.
+    simulationResult.hold_edges.forEach(([rName, pName]) => edges.push({ from: rName, to: pName, type: 'allocation' }));
+    simulationResult.wait_edges.forEach(([pName, rName]) => edges.push({ from: pName, to: rName, type: 'request' }));
 
     setGraphData({ nodes, edges });
 
@@ -441,6 +524,9 @@ function DetectionPhase({ addLog, simulationResult, resources, processes, banker
       });
       setDeadlockState(res.data.deadlock);
       addLog(`RAG Analysis: ${res.data.deadlock ? 'DEADLOCK' : 'SAFE'}`, res.data.deadlock ? 'error' : 'success');
+      (res.data.cycles || []).forEach(cycle => {
+        addLog(`Circular Wait: ${[...cycle, cycle[0]].join(' → ')}`, 'error');
+      });
 
       if (res.data.deadlock) {
         handleRecovery();
@@ -466,9 +552,7 @@ function DetectionPhase({ addLog, simulationResult, resources, processes, banker
     const { victim, new_allocation } = recoveryData;
 
     // In our simplified logic, termination releases all resources
-    new_allocation.forEach((row, i) => {
-      row.forEach((val, j) => updateBankerMatrix('allocation', i, j, val));
-    });
+    replaceAllocation(new_allocation);
 
     addLog(`System Recovered: ${victim.name} terminated.`, 'success');
     setRecoveryData(null);
@@ -511,77 +595,186 @@ function DetectionPhase({ addLog, simulationResult, resources, processes, banker
   );
 }
 
+// Above this many nodes the graph is drawn as plain dots without labels.
+const DETAIL_LIMIT = 300;
+
+// Draws the resource allocation graph on a canvas: one path per edge kind
+// and per node kind, so the cost per frame does not depend on React. The
+// layout comes from src/layoutWorker.js and never blocks the UI thread.
 function VisualRAG({ data }) {
-  if (data.nodes.length === 0) {
-    return (
-      <div style={{ height: '100%', display: 'flex', alignItems: 'center', justifyContent: 'center', opacity: 0.3 }}>
-        <Share2 size={40} />
-      </div>
-    );
-  }
-
-  const width = 400;
-  const height = 300;
-  const centerX = width / 2;
-  const centerY = height / 2;
-  const radius = 100;
-
-  const nodePos = {};
-  data.nodes.forEach((node, i) => {
-    const angle = (i / data.nodes.length) * 2 * Math.PI;
-    nodePos[node.id] = {
-      x: centerX + radius * Math.cos(angle),
-      y: centerY + radius * Math.sin(angle)
+  const containerRef = useRef(null);
+  const canvasRef = useRef(null);
+  const workerRef = useRef(null);
+  const pendingRef = useRef(null);
+  const [layout, setLayout] = useState(null);
+  const [size, setSize] = useState({ width: 400, height: 300 });
+
+  useEffect(() => {
+    const worker = new Worker(new URL('./layoutWorker.js', import.meta.url), { type: 'module' });
+    worker.onmessage = ({ data: reply }) => {
+      // Only the latest request is drawn; older layouts are dropped.
+      const pending = pendingRef.current;
+      if (pending && pending.id === reply.id) setLayout({ ...pending, positions: reply.positions });
     };
-  });
+    workerRef.current = worker;
+    return () => worker.terminate();
+  }, []);
+
+  useEffect(() => {
+    const observer = new ResizeObserver(([entry]) => {
+      const { width, height } = entry.contentRect;
+      if (width > 0 && height > 0) setSize({ width, height });
+    });
+    observer.observe(containerRef.current);
+    return () => observer.disconnect();
+  }, []);
 
+  useEffect(() => {
+    if (data.nodes.length === 0) return;
+    const index = new Map(data.nodes.map((node, i) => [node.id, i]));
+    const known = data.edges.filter(edge => index.has(edge.from) && index.has(edge.to));
+    const edges = new Int32Array(known.length * 2);
+    const requests = new Uint8Array(known.length);
+    known.forEach((edge, e) => {
+      edges[2 * e] = index.get(edge.from);
+      edges[2 * e + 1] = index.get(edge.to);
+      requests[e] = edge.type === 'request' ? 1 : 0;
+    });
+    const id = (pendingRef.current?.id || 0) + 1;
+    pendingRef.current = { id, nodes: data.nodes, edges, requests };
+    workerRef.current.postMessage({ id, count: data.nodes.length, edges });
+  }, [data]);
+
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    if (!canvas || !layout) return;
+    const { nodes, edges, requests, positions } = layout;
+    const { width, height } = size;
+    const ratio = window.devicePixelRatio || 1;
+    canvas.width = width * ratio;
+    canvas.height = height * ratio;
+    const ctx = canvas.getContext('2d');
+    ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+    ctx.clearRect(0, 0, width, height);
+
+    const style = getComputedStyle(canvas);
+    const color = name => style.getPropertyValue(name).trim();
+    const detailed = nodes.length <= DETAIL_LIMIT;
+    const spacing = Math.min(width, height) / Math.sqrt(nodes.length);
+    const radius = detailed ? Math.max(6, Math.min(15, 0.35 * spacing)) : Math.max(1.5, Math.min(4, 0.3 * spacing));
+    const arrow = detailed ? 8 : 0;
+
+    [[0, color('--accent-primary'), []], [1, color('--danger'), [4, 4]]].forEach(([kind, stroke, dash]) => {
+      const lines = new Path2D();
+      const heads = new Path2D();
+      for (let e = 0; e < requests.length; e++) {
+        if (requests[e] !== kind) continue;
+        const x1 = positions[2 * edges[2 * e]] * width;
+        const y1 = positions[2 * edges[2 * e] + 1] * height;
+        const x2 = positions[2 * edges[2 * e + 1]] * width;
+        const y2 = positions[2 * edges[2 * e + 1] + 1] * height;
+        const length = Math.hypot(x2 - x1, y2 - y1) || 1;
+        const ux = (x2 - x1) / length;
+        const uy = (y2 - y1) / length;
+        // Stop at the target's border so the arrowhead stays visible.
+        const tipX = x2 - ux * radius;
+        const tipY = y2 - uy * radius;
+        lines.moveTo(x1, y1);
+        lines.lineTo(tipX, tipY);
+        if (arrow) {
+          heads.moveTo(tipX, tipY);
+          heads.lineTo(tipX - ux * arrow - uy * arrow * 0.4, tipY - uy * arrow + ux * arrow * 0.4);
+          heads.lineTo(tipX - ux * arrow + uy * arrow * 0.4, tipY - uy * arrow - ux * arrow * 0.4);
+          heads.closePath();
+        }
+      }
+      ctx.setLineDash(dash);
+      ctx.strokeStyle = stroke;
+      ctx.lineWidth = detailed ? 1.5 : 0.5;
+      ctx.stroke(lines);
+      ctx.setLineDash([]);
+      ctx.fillStyle = stroke;
+      ctx.fill(heads);
+    });
+
+    const shapes = { resource: new Path2D(), process: new Path2D() };
+    nodes.forEach((node, i) => {
+      const x = positions[2 * i] * width;
+      const y = positions[2 * i + 1] * height;
+      if (node.type === 'resource') {
+        shapes.resource.rect(x - radius, y - radius, 2 * radius, 2 * radius);
+      } else {
+        shapes.process.moveTo(x + radius, y);
+        shapes.process.arc(x, y, radius, 0, 2 * Math.PI);
+      }
+    });
+    [['resource', color('--accent-primary')], ['process', color('--accent-secondary')]].forEach(([type, stroke]) => {
+      if (detailed) {
+        ctx.fillStyle = color('--bg-card');
+        ctx.fill(shapes[type]);
+        ctx.strokeStyle = stroke;
+        ctx.lineWidth = 2;
+        ctx.stroke(shapes[type]);
+      } else {
+        ctx.fillStyle = stroke;
+        ctx.fill(shapes[type]);
+      }
+    });
+
+    if (detailed) {
+      ctx.fillStyle = 'white';
+      ctx.font = 'bold 10px sans-serif';
+      ctx.textAlign = 'center';
+      ctx.textBaseline = 'middle';
+      nodes.forEach((node, i) => ctx.fillText(node.id, positions[2 * i] * width, positions[2 * i + 1] * height));
+    }
+  }, [layout, size]);
+
+  return (
+    <div ref={containerRef} style={{ width: '100%', height: '100%' }}>
+      {data.nodes.length === 0 ? (
+        <div style={{ height: '100%', display: 'flex', alignItems: 'center', justifyContent: 'center', opacity: 0.3 }}>
+          <Share2 size={40} />
+        </div>
+      ) : (
+        <canvas ref={canvasRef} style={{ width: '100%', height: '100%', display: 'block' }} />
+      )}
+    </div>
+  );
+}
+
+
+function MatrixRows({ matrix, rows, onChange }) {
   return (
-    <svg width="100%" height="100%" viewBox={`0 0 ${width} ${height}`}>
-      <defs>
-        <marker id="arrowhead" markerWidth="10" markerHeight="7" refX="10" refY="3.5" orient="auto">
-          <polygon points="0 0, 10 3.5, 0 7" fill="var(--text-muted)" />
-        </marker>
-        <marker id="arrowhead-red" markerWidth="10" markerHeight="7" refX="10" refY="3.5" orient="auto">
-          <polygon points="0 0, 10 3.5, 0 7" fill="var(--danger)" />
-        </marker>
-      </defs>
-
-      {data.edges.map((edge, i) => {
-        const start = nodePos[edge.from];
-        const end = nodePos[edge.to];
-        const isRequest = edge.type === 'request';
+    <div style={{ overflowY: 'auto', maxHeight: TABLE_HEIGHT }} onScroll={rows.onScroll}>
+      <div style={{ height: rows.padTop }} />
+      {matrix.slice(rows.start, rows.end).map((row, k) => {
+        const i = rows.start + k;
         return (
-          <line
-            key={i}
-            x1={start.x} y1={start.y}
-            x2={end.x} y2={end.y}
-            stroke={isRequest ? 'var(--danger)' : 'var(--accent-primary)'}
-            strokeWidth="1.5"
-            strokeDasharray={isRequest ? "4" : "0"}
-            markerEnd={`url(#${isRequest ? 'arrowhead-red' : 'arrowhead'})`}
-            className="rag-edge"
-          />
+          <div key={i} style={{ display: 'flex', gap: '5px', alignItems: 'center', height: ROW_HEIGHT }}>
+            <span style={{ fontSize: '12px', width: '20px' }}>P{i + 1}</span>
+            {row.map((v, j) => (
+              <input
+                key={j}
+                type="number"
+                className="compact"
+                value={v}
+                onChange={e => onChange(i, j, e.target.value)}
+              />
+            ))}
+          </div>
         );
       })}
-
-      {data.nodes.map((node, i) => (
-        <g key={i} transform={`translate(${nodePos[node.id].x}, ${nodePos[node.id].y})`}>
-          {node.type === 'resource' ? (
-            <rect x="-15" y="-15" width="30" height="30" rx="4" fill="var(--bg-card)" stroke="var(--accent-primary)" strokeWidth="2" />
-          ) : (
-            <circle r="15" fill="var(--bg-card)" stroke="var(--accent-secondary)" strokeWidth="2" />
-          )}
-          <text textAnchor="middle" dy=".3em" fontSize="10" fill="white" fontWeight="bold">{node.id}</text>
-        </g>
-      ))}
-    </svg>
+      <div style={{ height: rows.padBottom }} />
+    </div>
   );
 }
 
-
 function MultiInstanceDetectionPhase({ addLog, resources, bankerMatrices, updateBankerMatrix, requestMatrix, setRequestMatrix }) {
   const [deadlockInfo, setDeadlockInfo] = useState(null);
   const [manualAvailable, setManualAvailable] = useState(null);
+  const allocationRows = useVirtualRows(bankerMatrices.allocation.length);
+  const requestRows = useVirtualRows(requestMatrix.length);
 
   // Derive Available from Total Resources - Total Allocated
   const resNames = Object.keys(resources).sort(); // Sort to ensure Matrix Columns match R1, R2, R3...
@@ -627,7 +820,8 @@ function MultiInstanceDetectionPhase({ addLog, resources, bankerMatrices, update
   };
 
   const updateRequest = (i, j, val) => {
-    const newReq = requestMatrix.map(row => [...row]);
+    const newReq = [...requestMatrix];
+    newReq[i] = [...newReq[i]];
     newReq[i][j] = Number(val);
     setRequestMatrix(newReq);
   };
@@ -664,37 +858,15 @@ function MultiInstanceDetectionPhase({ addLog, resources, bankerMatrices, update
         </div>
         <div>
           <h4>Allocation (Shared)</h4>
-          {bankerMatrices.allocation.map((row, i) => (
-            <div key={i} style={{ display: 'flex', gap: '5px', marginBottom: '5px' }}>
-              <span style={{ fontSize: '12px', width: '20px' }}>P{i + 1}</span>
-              {row.map((v, j) => (
-                <input
-                  key={j}
-                  type="number"
-                  className="compact"
-                  value={v}
-                  onChange={e => updateBankerMatrix('allocation', i, j, e.target.value)}
-                />
-              ))}
-            </div>
-          ))}
+          <MatrixRows
+            matrix={bankerMatrices.allocation}
+            rows={allocationRows}
+            onChange={(i, j, val) => updateBankerMatrix('allocation', i, j, val)}
+          />
         </div>
         <div>
           <h4>Current Requests</h4>
-          {requestMatrix.map((row, i) => (
-            <div key={i} style={{ display: 'flex', gap: '5px', marginBottom: '5px' }}>
-              <span style={{ fontSize: '12px', width: '20px' }}>P{i + 1}</span>
-              {row.map((v, j) => (
-                <input
-                  key={j}
-                  type="number"
-                  className="compact"
-                  value={v}
-                  onChange={e => updateRequest(i, j, e.target.value)}
-                />
-              ))}
-            </div>
-          ))}
+          <MatrixRows matrix={requestMatrix} rows={requestRows} onChange={updateRequest} />
         </div>
       </div>
       <button className="secondary" onClick={runDetection} style={{ width: '100%', marginTop: '1.5rem' }}>
@@ -0,0 +1,119 @@
+// Resource allocation graph layout, computed off the main thread.
+//
+// Request: { id, count, edges } where edges is an Int32Array of node index
+// pairs. Reply: { id, positions } where positions is a Float32Array of x, y
+// pairs in [0, 1]. Small graphs keep the circular layout; larger ones use a
+// force-directed layout whose repulsion only looks at neighbouring grid
+// cells, so an iteration costs O(nodes + edges) instead of O(nodes²).
+
+const CIRCLE_LIMIT = 40;
+const ITERATIONS = 80;
+
+function circleLayout(count) {
+  const positions = new Float32Array(count * 2);
+  for (let i = 0; i < count; i++) {
+    const angle = (i / count) * 2 * Math.PI;
+    positions[2 * i] = 0.5 + 0.25 * Math.cos(angle);
+    positions[2 * i + 1] = 0.5 + (1 / 3) * Math.sin(angle);
+  }
+  return positions;
+}
+
+function forceLayout(count, edges) {
+  const positions = new Float32Array(count * 2);
+  const dx = new Float32Array(count);
+  const dy = new Float32Array(count);
+  // Sunflower seeding spreads nodes evenly and is deterministic.
+  for (let i = 0; i < count; i++) {
+    const r = Math.sqrt((i + 0.5) / count) * 0.5;
+    const angle = i * 2.399963;
+    positions[2 * i] = 0.5 + r * Math.cos(angle);
+    positions[2 * i + 1] = 0.5 + r * Math.sin(angle);
+  }
+
+  const k = Math.sqrt(1 / count);
+  const cells = Math.max(1, Math.floor(1 / (2 * k)));
+  const head = new Int32Array(cells * cells);
+  const next = new Int32Array(count);
+  let temperature = 0.1;
+
+  for (let iter = 0; iter < ITERATIONS; iter++) {
+    dx.fill(0);
+    dy.fill(0);
+    head.fill(-1);
+    for (let i = 0; i < count; i++) {
+      const cx = Math.min(cells - 1, Math.max(0, Math.floor(positions[2 * i] * cells)));
+      const cy = Math.min(cells - 1, Math.max(0, Math.floor(positions[2 * i + 1] * cells)));
+      const cell = cy * cells + cx;
+      next[i] = head[cell];
+      head[cell] = i;
+    }
+
+    for (let cy = 0; cy < cells; cy++) {
+      for (let cx = 0; cx < cells; cx++) {
+        for (let i = head[cy * cells + cx]; i !== -1; i = next[i]) {
+          for (let ny = Math.max(0, cy - 1); ny <= Math.min(cells - 1, cy + 1); ny++) {
+            for (let nx = Math.max(0, cx - 1); nx <= Math.min(cells - 1, cx + 1); nx++) {
+              for (let j = head[ny * cells + nx]; j !== -1; j = next[j]) {
+                if (j <= i) continue;
+                const ddx = positions[2 * i] - positions[2 * j];
+                const ddy = positions[2 * i + 1] - positions[2 * j + 1];
+                const dist2 = Math.max(ddx * ddx + ddy * ddy, 1e-9);
+                const force = (k * k) / dist2;
+                dx[i] += ddx * force;
+                dy[i] += ddy * force;
+                dx[j] -= ddx * force;
+                dy[j] -= ddy * force;
+              }
+            }
+          }
+        }
+      }
+    }
+
+    for (let e = 0; e < edges.length; e += 2) {
+      const a = edges[e];
+      const b = edges[e + 1];
+      const ddx = positions[2 * a] - positions[2 * b];
+      const ddy = positions[2 * a + 1] - positions[2 * b + 1];
+      const dist = Math.sqrt(ddx * ddx + ddy * ddy);
+      const force = dist / k;
+      dx[a] -= ddx * force;
+      dy[a] -= ddy * force;
+      dx[b] += ddx * force;
+      dy[b] += ddy * force;
+    }
+
+    for (let i = 0; i < count; i++) {
+      const length = Math.sqrt(dx[i] * dx[i] + dy[i] * dy[i]);
+      if (length > 0) {
+        const step = Math.min(length, temperature) / length;
+        positions[2 * i] = Math.min(1, Math.max(0, positions[2 * i] + dx[i] * step));
+        positions[2 * i + 1] = Math.min(1, Math.max(0, positions[2 * i + 1] + dy[i] * step));
+      }
+    }
+    temperature *= 0.95;
+  }
+
+  // Rescale into the unit square with a margin for node shapes.
+  let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+  for (let i = 0; i < count; i++) {
+    minX = Math.min(minX, positions[2 * i]);
+    maxX = Math.max(maxX, positions[2 * i]);
+    minY = Math.min(minY, positions[2 * i + 1]);
+    maxY = Math.max(maxY, positions[2 * i + 1]);
+  }
+  const spanX = Math.max(maxX - minX, 1e-6);
+  const spanY = Math.max(maxY - minY, 1e-6);
+  for (let i = 0; i < count; i++) {
+    positions[2 * i] = 0.05 + 0.9 * (positions[2 * i] - minX) / spanX;
+    positions[2 * i + 1] = 0.05 + 0.9 * (positions[2 * i + 1] - minY) / spanY;
+  }
+  return positions;
+}
+
+self.onmessage = ({ data }) => {
+  const { id, count, edges } = data;
+  const positions = count <= CIRCLE_LIMIT ? circleLayout(count) : forceLayout(count, edges);
+  self.postMessage({ id, positions }, [positions.buffer]);
+};
@@ -0,0 +1,167 @@
+from array import array
+
+import numpy as np
+
+from deadlock_logic import Resource, Process
+
+
+class ObjectStateStore:
+    """
+    Simulator state backed by one Resource and one Process object per entity.
+    """
+    def __init__(self, resources, processes=()):
+        self.resources = {name: Resource(name, units) for name, units in resources.items()}
+        self.processes = {}
+        for name in processes:
+            self.add_process(name)
+
+    def add_process(self, name):
+        if name not in self.processes:
+            self.processes[name] = Process(name)
+        return self.processes[name]
+
+    def request(self, process_name, resource_name, units=1):
+        return self.add_process(process_name).request_resource(self.resources[resource_name], units)
+
+    def replay(self, steps):
+        return np.array([
+            self.request(step['process'], step['resource'], step.get('units', 1)) for step in steps
+        ], dtype=bool)
+
+    def resource_usage(self):
+        return {name: r.allocated_units for name, r in self.resources.items()}
+
+    def resource_totals(self):
+        return {name: r.total_units for name, r in self.resources.items()}
+
+    def process_allocations(self):
+        return {name: p.allocated_resources for name, p in self.processes.items()}
+
+
+class ResourceView:
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def name(self):
+        return self.store.resource_names[self.index]
+
+    @property
+    def total_units(self):
+        return int(self.store.totals[self.index])
+
+    @property
+    def allocated_units(self):
+        return int(self.store.allocated[self.index])
+
+
+class ProcessView:
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def name(self):
+        return self.store.process_names[self.index]
+
+    @property
+    def allocated_resources(self):
+        row = self.store.allocation[self.index, :len(self.store.resource_names)]
+        return {self.store.resource_names[j]: int(row[j]) for j in np.flatnonzero(row)}
+
+
+class ArrayStateStore:
+    """
+    Struct-of-arrays simulator state: an integer allocation matrix plus
+    totals/allocated vectors, with names interned to row and column indices.
+    Per-entity access goes through small __slots__ views instead of one
+    Process/Resource object (and dict) per entity.
+    """
+    def __init__(self, resources, processes=(), dtype=np.int32):
+        self.dtype = dtype
+        self.resource_names = list(resources)
+        self.resource_index = {name: j for j, name in enumerate(self.resource_names)}
+        self.totals = np.array([resources[name] for name in self.resource_names], dtype=dtype)
+        self.allocated = np.zeros(len(self.resource_names), dtype=dtype)
+        self.process_names = []
+        self.process_index = {}
+        self.allocation = np.zeros((16, len(self.resource_names)), dtype=dtype)
+        for name in processes:
+            self.add_process(name)
+
+    def add_process(self, name):
+        index = self.process_index.get(name)
+        if index is None:
+            index = len(self.process_names)
+            if index == len(self.allocation):
+                grown = np.zeros((2 * len(self.allocation), self.allocation.shape[1]), dtype=self.dtype)
+                grown[:index] = self.allocation
+                self.allocation = grown
+            self.process_index[name] = index
+            self.process_names.append(name)
+        return index
+
+    def process(self, name):
+        return ProcessView(self, self.process_index[name])
+
+    def resource(self, name):
+        return ResourceView(self, self.resource_index[name])
+
+    def request(self, process_name, resource_name, units=1):
+        i = self.add_process(process_name)
+        j = self.resource_index[resource_name]
+        if self.totals[j] - self.allocated[j] >= units:
+            self.allocated[j] += units
+            self.allocation[i, j] += units
+            return True
+        return False
+
+    def replay(self, steps):
+        """
+        Replays a whole trace of {process, resource, units} steps and returns a
+        boolean success array. Admission runs over plain integer codes, and
+        granted units are scattered into the allocation matrix with a single
+        np.add.at at the end.
+        """
+        process_index = self.process_index
+        resource_index = self.resource_index
+        free = (self.totals - self.allocated).tolist()
+        success = []
+        process_codes = array('q')
+        resource_codes = array('q')
+        granted = array('q')
+        for step in steps:
+            i = process_index.get(step['process'])
+            if i is None:
+                i = self.add_process(step['process'])
+            j = resource_index[step['resource']]
+            units = step.get('units', 1)
+            if free[j] >= units:
+                free[j] -= units
+                process_codes.append(i)
+                resource_codes.append(j)
+                granted.append(units)
+                success.append(True)
+            else:
+                success.append(False)
+
+        process_codes = np.frombuffer(process_codes, dtype=np.int64)
+        resource_codes = np.frombuffer(resource_codes, dtype=np.int64)
+        granted = np.frombuffer(granted, dtype=np.int64).astype(self.dtype)
+        np.add.at(self.allocation, (process_codes, resource_codes), granted)
+        np.add.at(self.allocated, resource_codes, granted)
+        return np.array(success, dtype=bool)
+
+    def resource_usage(self):
+        return dict(zip(self.resource_names, self.allocated.tolist()))
+
+    def resource_totals(self):
+        return dict(zip(self.resource_names, self.totals.tolist()))
+
+    def process_allocations(self):
+        return {name: self.process(name).allocated_resources for name in self.process_names}
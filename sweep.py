@@ -0,0 +1,202 @@
+"""
+Scenario sweeps for capacity planning: runs BankersAlgorithm.is_safe and,
+when request matrices are given, MultiInstanceDetection.detect over a
+stacked batch of scenarios across a process pool.
+
+    python sweep.py --scenarios 5000 --processes 50 --resources 8 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from deadlock_logic import BankersAlgorithm, MultiInstanceDetection
+
+# Views onto the shared scenario buffers of the current batch, attached
+# lazily in each worker and replaced when a task names new segments.
+_worker_arrays = {}
+_worker_segments = []
+
+
+def _attach(specs):
+    names = [segment_name for segment_name, _, _ in specs.values()]
+    if [segment.name for segment in _worker_segments] != names:
+        for segment in _worker_segments:
+            segment.close()
+        _worker_segments.clear()
+        _worker_arrays.clear()
+        for name, (segment_name, shape, dtype) in specs.items():
+            segment = shared_memory.SharedMemory(name=segment_name)
+            _worker_segments.append(segment)
+            _worker_arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    return _worker_arrays
+
+
+def _run_range(specs, start, stop, keep_scenarios=True):
+    arrays = _attach(specs)
+    total = arrays['total']
+    max_demand = arrays['max_demand']
+    allocation = arrays['allocation']
+    request = arrays.get('request')
+    results = []
+    for s in range(start, stop):
+        is_safe, sequence = BankersAlgorithm(total[s], max_demand[s], allocation[s]).is_safe()
+        result = {"safe": is_safe, "sequence": sequence}
+        if request is not None:
+            available = total[s] - allocation[s].sum(axis=0)
+            deadlock, deadlocked = MultiInstanceDetection.detect(available, allocation[s], request[s])
+            result.update({"deadlock": deadlock, "deadlocked_processes": deadlocked})
+        results.append(result)
+    return _aggregate(results, keep_scenarios)
+
+
+def _share(arrays):
+    segments = []
+    specs = {}
+    for name, array in arrays.items():
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        segments.append(segment)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        specs[name] = (segment.name, array.shape, array.dtype.str)
+    return segments, specs
+
+
+def sweep(total, max_demand, allocation, request=None, workers=None, chunk_size=None, keep_scenarios=True, pool=None):
+    """
+    Evaluates S scenarios given as stacked arrays: total (S, m), max_demand and
+    allocation (S, n, m), and optionally request (S, n, m). The arrays are
+    copied once into shared memory and each worker maps them directly, so no
+    matrices are pickled per task. Returns aggregated counts plus, unless
+    `keep_scenarios` is false, the per-scenario results in input order.
+    `pool` reuses a running ProcessPoolExecutor instead of starting one.
+    """
+    arrays = {
+        'total': np.ascontiguousarray(total, dtype=np.int64),
+        'max_demand': np.ascontiguousarray(max_demand, dtype=np.int64),
+        'allocation': np.ascontiguousarray(allocation, dtype=np.int64)
+    }
+    if request is not None:
+        arrays['request'] = np.ascontiguousarray(request, dtype=np.int64)
+    num_scenarios = len(arrays['total'])
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, -(-num_scenarios // (workers * 4)))
+
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return _sweep_shared(arrays, chunk_size, keep_scenarios, pool)
+    return _sweep_shared(arrays, chunk_size, keep_scenarios, pool)
+
+
+def _sweep_shared(arrays, chunk_size, keep_scenarios, pool):
+    num_scenarios = len(arrays['total'])
+    segments, specs = _share(arrays)
+    try:
+        starts = range(0, num_scenarios, chunk_size)
+        stops = [min(start + chunk_size, num_scenarios) for start in starts]
+        chunks = list(pool.map(_run_range, [specs] * len(starts), starts, stops, [keep_scenarios] * len(starts)))
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+    return _merge(chunks, keep_scenarios)
+
+
+def sweep_iter(scenarios, batch_size=1024, workers=None, keep_scenarios=True):
+    """
+    Sweeps scenarios from an iterable of (total, max_demand, allocation) or
+    (total, max_demand, allocation, request) tuples, stacking them into
+    batches of `batch_size` that share one process pool. With
+    `keep_scenarios=False` only the counts are kept, so arbitrarily long
+    generators run in bounded memory; otherwise every per-scenario result
+    is returned.
+    """
+    workers = workers or os.cpu_count() or 1
+    parts = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for scenario in scenarios:
+            batch.append(scenario)
+            if len(batch) == batch_size:
+                parts.append(_sweep_batch(batch, workers, keep_scenarios, pool))
+                batch = []
+                if not keep_scenarios:
+                    parts = [_merge(parts, False)]
+        if batch:
+            parts.append(_sweep_batch(batch, workers, keep_scenarios, pool))
+    return _merge(parts, keep_scenarios)
+
+
+def _sweep_batch(batch, workers, keep_scenarios, pool):
+    columns = list(zip(*batch))
+    stacked = [np.stack(column) for column in columns]
+    return sweep(*stacked, workers=workers, keep_scenarios=keep_scenarios, pool=pool)
+
+
+def _aggregate(scenarios, keep_scenarios=True):
+    summary = {
+        "safe": sum(1 for s in scenarios if s["safe"]),
+        "unsafe": sum(1 for s in scenarios if not s["safe"])
+    }
+    if scenarios and "deadlock" in scenarios[0]:
+        summary["deadlocked"] = sum(1 for s in scenarios if s["deadlock"])
+    if keep_scenarios:
+        summary["scenarios"] = scenarios
+    return summary
+
+
+def _merge(summaries, keep_scenarios=True):
+    summary = {"safe": 0, "unsafe": 0}
+    scenarios = []
+    for part in summaries:
+        summary["safe"] += part["safe"]
+        summary["unsafe"] += part["unsafe"]
+        if "deadlocked" in part:
+            summary["deadlocked"] = summary.get("deadlocked", 0) + part["deadlocked"]
+        if keep_scenarios:
+            scenarios.extend(part["scenarios"])
+    if keep_scenarios:
+        summary["scenarios"] = scenarios
+    return summary
+
+
+def random_scenarios(num_scenarios, num_procs, num_res, seed=0):
+    rng = np.random.default_rng(seed)
+    allocation = rng.integers(0, 4, size=(num_scenarios, num_procs, num_res))
+    max_demand = allocation + rng.integers(0, 6, size=(num_scenarios, num_procs, num_res))
+    total = allocation.sum(axis=1) + rng.integers(0, 10, size=(num_scenarios, num_res))
+    request = rng.integers(0, 3, size=(num_scenarios, num_procs, num_res))
+    return total, max_demand, allocation, request
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=50)
+    parser.add_argument('--resources', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-detect', action='store_true', help='skip multi-instance detection')
+    parser.add_argument('--output', help='write per-scenario results to this JSON file')
+    args = parser.parse_args(argv)
+
+    total, max_demand, allocation, request = random_scenarios(args.scenarios, args.processes, args.resources, args.seed)
+    start = time.perf_counter()
+    summary = sweep(total, max_demand, allocation, None if args.no_detect else request, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"scenarios: {args.scenarios}  safe: {summary['safe']}  unsafe: {summary['unsafe']}"
+          + (f"  deadlocked: {summary['deadlocked']}" if 'deadlocked' in summary else ''))
+    print(f"elapsed: {elapsed:.2f}s  ({args.scenarios / elapsed:.0f} scenarios/s)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
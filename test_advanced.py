@@ -33,6 +33,40 @@ def test_banker_safe():
     response = requests.post(f"{BASE_URL}/banker/safe", json=data, timeout=5)
     print("Banker Safe Status:", response.json())
 
+def test_banker_session():
+    print("\nTesting /api/banker/session...")
+    data = {
+        "total": [10, 5, 7],
+        "max_demand": [[7, 5, 3], [3, 2, 2], [9, 0, 2], [2, 2, 2], [4, 3, 3]],
+        "allocation": [[0, 1, 0], [2, 0, 0], [3, 0, 2], [2, 1, 1], [0, 0, 2]]
+    }
+    session = requests.post(f"{BASE_URL}/banker/session", json=data, timeout=5).json()
+    session_url = f"{BASE_URL}/banker/session/{session['session_id']}"
+    response = requests.post(f"{session_url}/request", json={"process_idx": 1, "request": [1, 0, 2]}, timeout=5)
+    print("Session Request:", response.json())
+    assert response.json()["granted"]
+    requests.delete(session_url, timeout=5)
+
+def test_simulate_multi_unit():
+    print("\nTesting /api/simulate with a multi-unit resource...")
+    # P1 waits for a second unit of R1 while P2 holds one, but P2 is not
+    # blocked, so there is no circular wait.
+    data = {
+        "resources": {"R1": 3},
+        "processes": ["P1", "P2"],
+        "steps": [
+            {"process": "P1", "resource": "R1"},
+            {"process": "P2", "resource": "R1"},
+            {"process": "P1", "resource": "R1", "units": 2}
+        ]
+    }
+    result = requests.post(f"{BASE_URL}/simulate", json=data, timeout=5).json()
+    print("Simulation:", result["deadlock"], result["wait_edges"])
+    assert not result["deadlock"]
+    assert result["deadlock_step"] is None
+
 if __name__ == "__main__":
     test_recovery()
     test_banker_safe()
+    test_banker_session()
+    test_simulate_multi_unit()
@@ -0,0 +1,73 @@
+"""
+Compact binary encoding for the matrix endpoints.
+
+Layout (all little-endian):
+
+    b"NXA1" | uint32 header length | JSON header | padding | array buffers
+
+The header is {"fields": {...}, "arrays": {name: {"shape": [...], "offset": n}}}
+where offsets are relative to the start of the buffers, which begin on an
+8-byte boundary. Arrays are int32. Decoding wraps the body with
+np.frombuffer, so no matrix data is copied.
+
+encode() raises ValueError for arrays that are not integers or do not fit
+in int32 instead of wrapping them; callers can fall back to JSON. decode()
+raises DecodeError (a ValueError) for any malformed body.
+"""
+import json
+import struct
+
+import numpy as np
+
+MIMETYPE = 'application/vnd.nexus.arrays'
+MAGIC = b'NXA1'
+DTYPE = np.dtype('<i4')
+LIMITS = np.iinfo(DTYPE)
+
+
+class DecodeError(ValueError):
+    pass
+
+
+def _as_wire_array(name, array):
+    values = np.asarray(array)
+    if values.size == 0:
+        return np.ascontiguousarray(values, dtype=DTYPE)
+    if values.dtype.kind not in 'biu':
+        raise ValueError(f"'{name}' is not an integer array")
+    if values.min() < LIMITS.min or values.max() > LIMITS.max:
+        raise ValueError(f"'{name}' has values outside the int32 range")
+    return np.ascontiguousarray(values, dtype=DTYPE)
+
+
+def encode(fields, arrays):
+    arrays = {name: _as_wire_array(name, array) for name, array in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header = json.dumps({"fields": fields, "arrays": layout}).encode()
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+    return b''.join([MAGIC, struct.pack('<I', len(header)), header] + [array.tobytes() for array in arrays.values()])
+
+
+def decode(body):
+    """
+    Returns the fields and arrays of an encoded body as one dict. Arrays are
+    read-only views into `body`.
+    """
+    if body[:4] != MAGIC:
+        raise DecodeError("Not a binary matrix payload")
+    try:
+        (header_length,) = struct.unpack_from('<I', body, 4)
+        start = 8 + header_length
+        header = json.loads(bytes(body[8:start]))
+        payload = dict(header.get("fields", {}))
+        for name, spec in header.get("arrays", {}).items():
+            shape = tuple(int(n) for n in spec["shape"])
+            count = int(np.prod(shape)) if shape else 1
+            payload[name] = np.frombuffer(body, dtype=DTYPE, count=count, offset=start + int(spec["offset"])).reshape(shape)
+    except (struct.error, KeyError, TypeError, AttributeError, ValueError) as e:
+        raise DecodeError(f"Malformed binary matrix payload: {e}") from None
+    return payload